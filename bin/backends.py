@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# where runs actually get run: PBS on the cluster (qsub/qstat), or a local
+# pool on a workstation that starts a work dir only when there are enough
+# free cores for its OMP_NUM_THREADS, both answering the same status queries
+
+####################
+# IMPORT LIBRARIES #
+####################
+import argparse
+import getpass
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+
+# where the local backend keeps track of its jobs
+REGISTRY = os.path.join(os.environ.get("MESA_BUILD_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "mesa-dispatcher")), "local")
+
+# what the states mean, PBS letters for both backends
+STATES = {"Q": "queued", "R": "running", "C": "completed", "E": "failed", "H": "held"}
+
+##################
+# DEFINE CLASSES #
+##################
+class Job:
+    '''what a status query tells us about one run'''
+
+    def __init__(self, name, state, job_id = "", work = None, threads = None, index = None):
+        self.name = name
+        self.state = state
+        self.job_id = job_id
+        self.work = work
+        self.threads = threads
+        # which line of its manifest a sweep job is running
+        self.index = index
+
+    def __str__(self):
+        return self.name + " " + STATES.get(self.state, self.state) + " (" + self.job_id + ")"
+
+class PBS:
+    '''the cluster, through qsub and qstat'''
+    name = "pbs"
+
+    def submit(self, work, script = "submit.sh", env = None):
+        '''qsub a script from its work dir, with any env handed over as
+        qsub -v, returns the job id'''
+        cmd = ["qsub"]
+        if env:
+            cmd += ["-v", ",".join(key + "=" + str(value) for key, value in env.items())]
+        proc = subprocess.run(cmd + [script], cwd = work, stdout = subprocess.PIPE,
+                              stderr = subprocess.STDOUT, universal_newlines = True)
+        if proc.returncode != 0:
+            raise RuntimeError("qsub " + script + " failed in " + work + ": " + proc.stdout.strip())
+        return proc.stdout.strip()
+
+    def wait(self):
+        '''the scheduler takes it from here'''
+
+    def status(self, user = None):
+        '''our jobs in the queue, by run name (the MESA_ job name), from the
+        full qstat -f listing, since plain qstat cuts names at 16 characters,
+        with job arrays listed one subjob at a time'''
+        user = user or getpass.getuser()
+        proc = subprocess.run(["qstat", "-f", "-t"], stdout = subprocess.PIPE, stderr = subprocess.DEVNULL,
+                              universal_newlines = True)
+        jobs = []
+        for fields in qstat_jobs(proc.stdout):
+            name = fields.get("Job_Name", "")
+            owner = fields.get("Job_Owner", "").split("@")[0]
+            # the array itself, its subjobs are listed too
+            if owner != user or not name.startswith("MESA_") or "[]" in fields["Job Id"]:
+                continue
+            jobs.append(Job(name[len("MESA_"):], fields.get("job_state"), fields["Job Id"],
+                            index = job_index(fields)))
+        return jobs
+
+class Local:
+    '''this machine: each work dir's submit script runs as a child process,
+    started only once enough cores are free for its OMP_NUM_THREADS, so the
+    runs never ask for more cores than there are between them'''
+    name = "local"
+
+    def __init__(self, cores = None, registry = REGISTRY):
+        self.cores = cores or os.cpu_count() or 1
+        self.free = self.cores
+        self.registry = registry
+        self.ready = threading.Condition()
+        self.workers = []
+        self.failed = 0
+
+    def submit(self, work, script = "submit.sh", env = None):
+        '''queue a script to run from its work dir, returns a job id'''
+        work = os.path.abspath(work)
+        env = dict(env or {})
+        threads = int(env.get("OMP_NUM_THREADS") or script_threads(os.path.join(work, script)))
+        threads = max(1, min(threads, self.cores))
+        job = Job(job_name(work, env), "Q", "local." + job_name(work, env), work, threads)
+        self.record(job)
+        worker = threading.Thread(target = self.run, args = (job, script, env))
+        worker.start()
+        self.workers.append(worker)
+        return job.job_id
+
+    def run(self, job, script, env):
+        '''wait for cores, then run the job and give them back'''
+        with self.ready:
+            while self.free < job.threads:
+                self.ready.wait()
+            self.free -= job.threads
+        try:
+            env = dict(os.environ, **env)
+            env["OMP_NUM_THREADS"] = str(job.threads)
+            env["PBS_O_WORKDIR"] = job.work
+            # the script's own export would win over ours, so run it with
+            # that line set to the cores we actually gave it
+            cmd = ["bash", script]
+            try:
+                with open(os.path.join(job.work, script)) as f:
+                    cmd = ["bash", "-c", set_threads(f.read(), job.threads), script]
+            except OSError:
+                pass
+            with open(os.path.join(job.work, "local.log"), "w") as log:
+                proc = subprocess.Popen(cmd, cwd = job.work, env = env,
+                                        stdout = log, stderr = subprocess.STDOUT)
+                job.state = "R"
+                self.record(job, pid = proc.pid)
+                code = proc.wait()
+            job.state = "C" if code == 0 else "E"
+            self.record(job, code = code)
+            if code != 0:
+                # jobs finish on their own threads
+                with self.ready:
+                    self.failed += 1
+        finally:
+            with self.ready:
+                self.free += job.threads
+                self.ready.notify_all()
+
+    def wait(self):
+        '''block until every job we started has finished'''
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def record(self, job, pid = None, code = None):
+        '''note a job's state where status() (in any process) can find it'''
+        os.makedirs(self.registry, exist_ok = True)
+        entry = {"name": job.name, "state": job.state, "job_id": job.job_id, "work": job.work,
+                 "threads": job.threads, "pid": pid, "code": code}
+        fd, tmp = tempfile.mkstemp(dir = self.registry)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, os.path.join(self.registry, job.name + ".json"))
+
+    def status(self, user = None):
+        '''every job the local backend has run, running ones checked to still
+        be alive in case whoever started them went away'''
+        jobs = []
+        if not os.path.isdir(self.registry):
+            return jobs
+        for entry in sorted(os.listdir(self.registry)):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.registry, entry)) as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                continue
+            state = info["state"]
+            if state == "R" and not alive(info.get("pid")):
+                state = "E"
+            jobs.append(Job(info["name"], state, info["job_id"], info["work"], info["threads"]))
+        return jobs
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def script_threads(file_name):
+    '''the OMP_NUM_THREADS a submit script exports, 1 if it doesn't'''
+    try:
+        with open(file_name) as f:
+            for line in f:
+                match = re.match(r"^\s*export\s+OMP_NUM_THREADS=(\d+)", line)
+                if match:
+                    return int(match.group(1))
+    except OSError:
+        pass
+    return 1
+
+def set_threads(text, threads):
+    '''a submit script with the OMP_NUM_THREADS it exports set to threads'''
+    return re.sub(r"(?m)^(\s*export\s+OMP_NUM_THREADS=)\d+", lambda m: m.group(1) + str(threads), text)
+
+def job_name(work, env):
+    '''what a job is called, the run name, plus its index for sweep jobs'''
+    name = os.path.basename(os.path.normpath(work))
+    if "INDEX" in env:
+        name += "." + str(env["INDEX"])
+    return name
+
+def qstat_jobs(text):
+    '''the attributes of each job in qstat -f output, one dict per job,
+    with values that wrap onto tab indented lines put back together'''
+    jobs = []
+    key = None
+    for line in text.splitlines():
+        if line.startswith("Job Id:"):
+            jobs.append({"Job Id": line[len("Job Id:"):].strip()})
+            key = None
+        elif line.startswith("\t") and key is not None:
+            jobs[-1][key] += line.strip()
+        elif " = " in line and jobs:
+            key, value = line.strip().split(" = ", 1)
+            jobs[-1][key] = value
+        else:
+            key = None
+    return jobs
+
+def job_index(fields):
+    '''the index of a job array subjob, or the INDEX handed to a job with
+    qsub -v, from its qstat -f attributes, None if it has neither'''
+    for key in ["array_index", "job_array_id"]:
+        if key in fields:
+            return int(fields[key])
+    match = re.search(r"\[(\d+)\]", fields["Job Id"])
+    if match:
+        return int(match.group(1))
+    match = re.search(r"(?:^|,)INDEX=(\d+)", fields.get("Variable_List", ""))
+    if match:
+        return int(match.group(1))
+    return None
+
+def alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def get_backend(name, cores = None):
+    '''a backend by name, 'pbs' or 'local' '''
+    if name == "pbs":
+        return PBS()
+    if name == "local":
+        return Local(cores)
+    raise ValueError("no backend called '" + str(name) + "', use pbs or local")
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(description = "list the jobs a backend knows about")
+    parser.add_argument("-b", "--backend", help="pbs or local", type=str, default="pbs")
+    args = parser.parse_args()
+
+    for job in get_backend(args.backend).status():
+        print(job)
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,72 @@
+#!/bin/bash
+# this script:
+# 1) hashes the run_star_extras (and the rest of src/), the makefile and
+#    $MESA_DIR of the MESA work dir it's run in
+# 2) if a star executable was already built from the same hash, links (or
+#    copies) it in
+# 3) otherwise runs ./clean and ./mk, and saves the result for next time
+set -e
+
+Help()
+{
+   # Display Help
+   echo "This script:"
+   echo "1) hashes src/, make/makefile and \$MESA_DIR of the current work dir,"
+   echo "2) links in a star executable already built from the same hash,"
+   echo "3) or runs ./clean and ./mk, and caches the result."
+   echo
+   echo "syntax: cached-mk [-f]"
+   echo
+   echo "options:"
+   echo "-f     Rebuild even if the cache has this hash."
+   echo
+   echo "The cache lives in \$MESA_BUILD_CACHE, ~/.cache/mesa-dispatcher by default."
+   echo
+}
+
+FORCE=0
+
+# get the options
+while getopts ":hf" option; do
+   case $option in
+      h) # display Help
+         Help
+         exit;;
+      f) # rebuild anyway
+         FORCE=1;;
+     \?) # incorrect option
+         echo "Error: Invalid option"
+         exit;;
+   esac
+done
+
+CACHE=${MESA_BUILD_CACHE:-${HOME}/.cache/mesa-dispatcher}
+
+# everything that goes into the executable
+KEY=$( (echo "$MESA_DIR"; cat make/makefile; for f in src/*; do echo "$f"; cat "$f"; done) | sha256sum | cut -d " " -f1)
+ENTRY=${CACHE}/${KEY}
+mkdir -p ${CACHE}
+
+# one build per hash at a time, anyone else deploying the same source waits
+# for it and then links the result
+exec 9> ${ENTRY}.lock
+flock 9
+
+if [[ $FORCE == "0" && -f ${ENTRY}/star ]]; then
+    rm -f star
+    ln ${ENTRY}/star star 2> /dev/null || cp -p ${ENTRY}/star star
+    echo "using cached build ${KEY:0:12}"
+    exit
+fi
+
+# clean and compile
+./clean
+./mk
+
+# save it, whole or not at all
+TMP=$(mktemp -d ${CACHE}/.tmp.XXXXXX)
+chmod 755 ${TMP}
+cp -p star ${TMP}/star
+rm -rf ${ENTRY}
+mv ${TMP} ${ENTRY}
+echo "cached build ${KEY:0:12}"
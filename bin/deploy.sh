@@ -8,7 +8,7 @@
 #   -> profile_columns.list
 # 3) edits templates
 # 4) copies inlist into log directory
-# 5) imports run_star_extras and compiles
+# 5) imports run_star_extras and compiles, or reuses an identical build
 # 6) submits job
 set -e
 
@@ -24,12 +24,13 @@ Help()
    echo "  -> profile_columns.list,"
    echo "3) edits templates to added specified parameters,"
    echo "4) copies inlist into log directory,"
-   echo "5) imports run_star_extras and compiles,"
+   echo "5) imports run_star_extras and compiles, or reuses an identical build,"
    echo "6) and submits the job."
    echo
-   echo "syntax: deploy [NAME] [TEMP DIR] [STAR MASS] [DM MASS] [DM DENSITY] [THREADS]"
+   echo "syntax: deploy [-l] [NAME] [TEMP DIR] [STAR MASS] [DM MASS] [DM DENSITY] [THREADS]"
    echo
    echo "options:"
+   echo "-l             Light: make a light work dir (see new-star-work -l)."
    echo "[NAME]         Name of run."
    echo "[TEMP DIR]     Dictory containing all templates."
    echo "[STAR MASS]    Inital mass of the star in solar masses."
@@ -40,17 +41,22 @@ Help()
    echo
 }
 
+LIGHT=""
+
 # get the options
-while getopts ":h" option; do
+while getopts ":hl" option; do
    case $option in
       h) # display Help
          Help
          exit;;
+      l) # light work dir
+         LIGHT="-l";;
      \?) # incorrect option
          echo "Error: Invalid option"
          exit;;
    esac
 done
+shift $((OPTIND - 1))
 
 # read from commandline args
 NAME=$1
@@ -68,7 +74,12 @@ FULLNAME=$"$NAME$MASS"
 DIR=${2%/}
 
 # make a new MESA work DIR
-new-star-work ${FULLNAME}
+new-star-work ${LIGHT} ${FULLNAME}
+
+# a light work dir links to a shared copy, so replace what's there rather
+# than write through the links
+rm -f ${FULLNAME}/inlist ${FULLNAME}/submit.sh ${FULLNAME}/history_columns.list \
+    ${FULLNAME}/profile_columns.list ${FULLNAME}/src/run_star_extras.f
 cp ${DIR}/inlists/inlist_template ${FULLNAME}/inlist
 cp ${DIR}/inlists/submit_template.sh ${FULLNAME}/submit.sh
 cp ${DIR}/inlists/history_columns.list ${FULLNAME}/.
@@ -86,9 +97,8 @@ cp inlist LOGS/${FULLNAME}/.
 # fill in the submit script
 set-sub submit.sh ${FULLNAME} ${THREADS} ${PPN}
 
-# clean and compile
-./clean
-./mk
+# compile, or reuse an identical build from an earlier deploy
+cached-mk
 
 # submit the job
 qsub submit.sh 
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# fills in an inlist (or a PBS submit script) in a single pass: every line is
+# read once, the keys we were handed are swapped in, and the result replaces
+# the file atomically, so a dispatcher can render hundreds of them in process
+
+####################
+# IMPORT LIBRARIES #
+####################
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# a namelist assignment, e.g. '      X_CTRL(1) = 1d4 ! DM mass', the value
+# stepping over quoted strings (quotes inside doubled) so a ! in one isn't
+# taken for a comment
+ASSIGN = re.compile(r"^(\s*)([A-Za-z_][\w%]*(?:\s*\([\s\d,:]*\))?)(\s*=\s*)"
+                    r"((?:'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[^!'\"])*?)(\s*(?:!.*)?)$")
+# the start and end of a namelist group
+GROUP = re.compile(r"^\s*&(\w+)")
+END = re.compile(r"^\s*/\s*(?:!.*)?$")
+
+# the lines of a submit script we know how to fill in
+SUBMIT = {
+    "name": (re.compile(r"^(#PBS\s+-N\s+)(\S*)(.*)$"), lambda v: "MESA_" + v),
+    "ppn": (re.compile(r"^(#PBS\s+-l\s+.*ppn=)(\d*)(.*)$"), str),
+    "threads": (re.compile(r"^(export\s+OMP_NUM_THREADS=)(\S*)(.*)$"), str),
+}
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def normalize(key):
+    '''fortran doesn't care about case or spaces in a key, so neither do we'''
+    return re.sub(r"\s+", "", key).lower()
+
+def fortran(value):
+    '''write a python value the way a namelist wants it, strings are taken as
+    already being fortran (so quote them yourself, see quote())'''
+    if isinstance(value, bool):
+        return ".true." if value else ".false."
+    if isinstance(value, float):
+        return repr(value).replace("e", "d")
+    return str(value)
+
+def quote(value):
+    '''a fortran string literal'''
+    return "'" + str(value).replace("'", "''") + "'"
+
+def parse_overrides(pairs):
+    '''turn 'key=value' strings into overrides, a key can be given as
+    group:key to add it to that group if the inlist doesn't have it yet'''
+    overrides = {}
+    for pair in pairs:
+        if "=" not in pair:
+            raise ValueError("'" + pair + "' isn't key=value")
+        key, value = pair.split("=", 1)
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+def read_inlist(file_name):
+    '''every key an inlist sets, as {normalized key: value as written}'''
+    values = {}
+    with open(file_name) as f:
+        for line in f:
+            match = ASSIGN.match(line.rstrip("\n"))
+            if match and not line.lstrip().startswith("!"):
+                values[normalize(match.group(2))] = match.group(4).strip()
+    return values
+
+def number(value):
+    '''a fortran number (1d4, 1.5D-3, ...) as a python float, None if it isn't one'''
+    try:
+        return float(str(value).lower().replace("d", "e"))
+    except ValueError:
+        return None
+
+def set_inlist(text, overrides):
+    '''text of an inlist with the overrides (key -> value) swapped in, keys
+    the inlist doesn't have are added to the group named in 'group:key',
+    repeated keys are dropped after the first'''
+    wanted = {}
+    for key, value in overrides.items():
+        group = None
+        if ":" in key:
+            group, key = key.split(":", 1)
+            group = group.strip().lstrip("&").lower()
+        wanted[normalize(key)] = (key.strip(), fortran(value), group)
+
+    out = []
+    done = set()
+    group = None
+    for line in text.splitlines(True):
+        stripped = line.rstrip("\n")
+        match = GROUP.match(stripped)
+        if match:
+            group = match.group(1).lower()
+        elif END.match(stripped) and group is not None:
+            # add anything meant for this group that it didn't have
+            for norm, (key, value, where) in wanted.items():
+                if where == group and norm not in done:
+                    out.append("      " + key + " = " + value + "\n")
+                    done.add(norm)
+            group = None
+        else:
+            match = ASSIGN.match(stripped)
+            if match and normalize(match.group(2)) in wanted:
+                norm = normalize(match.group(2))
+                if norm in done:
+                    continue
+                value = wanted[norm][1]
+                line = match.group(1) + match.group(2) + match.group(3) + value + match.group(5) + line[len(stripped):]
+                done.add(norm)
+        out.append(line)
+
+    missing = [wanted[norm][0] for norm in wanted if norm not in done]
+    if len(missing) > 0:
+        raise KeyError("not in the inlist, give them as group:key to add them: " + ", ".join(missing))
+    return "".join(out)
+
+def set_submit(text, overrides):
+    '''text of a PBS submit script with the run name, ppn and OMP threads
+    (the keys 'name', 'ppn' and 'threads') swapped in'''
+    for key in overrides:
+        if key not in SUBMIT:
+            raise KeyError("can't set '" + key + "' in a submit script, only " + ", ".join(SUBMIT))
+    out = []
+    for line in text.splitlines(True):
+        stripped = line.rstrip("\n")
+        for key, value in overrides.items():
+            pattern, form = SUBMIT[key]
+            match = pattern.match(stripped)
+            if match and value is not None:
+                line = match.group(1) + form(value) + match.group(3) + line[len(stripped):]
+                break
+        out.append(line)
+    return "".join(out)
+
+def write_atomic(file_name, text):
+    '''replace a file in one go, so nobody ever sees half of it'''
+    folder = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp = tempfile.mkstemp(dir = folder, prefix = "." + os.path.basename(file_name) + ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        if os.path.exists(file_name):
+            os.chmod(tmp, os.stat(file_name).st_mode & 0o7777)
+        else:
+            os.chmod(tmp, 0o664)
+        os.replace(tmp, file_name)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def render(template, file_name, overrides, submit = False):
+    '''fill in template (an inlist, or a submit script) and write it to
+    file_name, which can be the template itself'''
+    with open(template) as f:
+        text = f.read()
+    text = set_submit(text, overrides) if submit else set_inlist(text, overrides)
+    write_atomic(file_name, text)
+
+def run_overrides(name, mass, mdm, rho):
+    '''the inlist keys deploy sets for a run, as set-inlist always has'''
+    return {
+        "initial_mass": mass,
+        "log_directory": quote("LOGS/" + name + mass),
+        "star_history_name": quote("history_" + name + mass + ".data"),
+        "X_CTRL(1)": mdm,
+        "X_CTRL(2)": rho,
+    }
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(description = "set keys of an inlist, or a submit script, in place")
+    parser.add_argument("file", help="inlist (or submit script) to edit", type=str)
+    parser.add_argument("overrides", nargs='*', help="key=value, or group:key=value to add a key the inlist doesn't have", type=str)
+    parser.add_argument("-t", "--template", help="read from this file instead, and write to FILE", type=str)
+    parser.add_argument("-s", "--submit", help="FILE is a submit script, keys are name, ppn, and threads", action='store_true')
+    args = parser.parse_args()
+
+    try:
+        overrides = parse_overrides(args.overrides)
+        render(args.template or args.file, args.file, overrides, submit = args.submit)
+    except (KeyError, ValueError) as err:
+        print(args.file + ": " + str(err).strip("\"'"), file = sys.stderr)
+        sys.exit(1)
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
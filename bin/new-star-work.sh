@@ -1,11 +1,88 @@
 #!/bin/bash
 # creates new work dir at $1
-# 
+#
+set -e
 
-# create the new directory
-cp -r $MESA_DIR/star/work $1
+Help()
+{
+   # Display Help
+   echo "Creates a new MESA work directory from \$MESA_DIR/star/work."
+   echo
+   echo "syntax: new-star-work [-l] [NAME]"
+   echo
+   echo "options:"
+   echo "-l       Light: link to one shared copy of the work dir instead of"
+   echo "         copying it, only src/ and make/ are the run's own."
+   echo "[NAME]   Directory to create."
+   echo
+   echo "The shared copy lives in \$MESA_BUILD_CACHE, ~/.cache/mesa-dispatcher by default."
+   echo
+}
 
-# clean out what we don't need
-rm $1/inlist*
-rm $1/README*
+LIGHT=0
 
+# get the options
+while getopts ":hl" option; do
+   case $option in
+      h) # display Help
+         Help
+         exit;;
+      l) # link, don't copy
+         LIGHT=1;;
+     \?) # incorrect option
+         echo "Error: Invalid option"
+         exit;;
+   esac
+done
+shift $((OPTIND - 1))
+
+if [[ $LIGHT == "0" ]]; then
+    # create the new directory
+    cp -r $MESA_DIR/star/work $1
+
+    # clean out what we don't need
+    rm $1/inlist*
+    rm $1/README*
+    exit
+fi
+
+# one pristine copy of the work dir per MESA install, made by whoever gets
+# here first
+CACHE=${MESA_BUILD_CACHE:-${HOME}/.cache/mesa-dispatcher}
+TEMPLATE=${CACHE}/work.$(echo "$MESA_DIR" | sha256sum | cut -c1-12)
+mkdir -p ${CACHE}
+exec 9> ${TEMPLATE}.lock
+flock 9
+if [[ ! -d ${TEMPLATE} ]]; then
+    TMP=$(mktemp -d ${CACHE}/.tmp.XXXXXX)
+    cp -r $MESA_DIR/star/work/. ${TMP}
+    chmod 755 ${TMP}
+    mv ${TMP} ${TEMPLATE}
+fi
+flock -u 9
+
+mkdir $1
+for f in ${TEMPLATE}/* ${TEMPLATE}/.[!.]*; do
+    [[ -e $f ]] || continue
+    NAME=${f##*/}
+    case $NAME in
+        # we don't need these, or every run makes its own
+        inlist*|README*|star|LOGS|photos|.mesa_temp_cache)
+            ;;
+        # sources get edited, so the run gets its own copy
+        src)
+            cp -r --reflink=auto $f $1/$NAME;;
+        # objects get built here, so a dir of our own, but the makefile
+        # itself never changes
+        make)
+            mkdir $1/$NAME
+            for g in $f/*; do
+                [[ -f $g ]] || continue
+                ln $g $1/$NAME/ 2> /dev/null || cp --reflink=auto $g $1/$NAME/
+            done;;
+        # everything else is only ever read
+        *)
+            ln -s $f $1/$NAME;;
+    esac
+done
+mkdir $1/LOGS $1/photos
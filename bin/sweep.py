@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# deploys a whole grid of runs (star masses x DM masses x DM densities) from
+# one sweep spec, doing the same steps as deploy.sh for every grid point but
+# several grid points at a time
+
+####################
+# IMPORT LIBRARIES #
+####################
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import namelist
+import backends
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# what a spec gets if it doesn't say otherwise
+DEFAULTS = {
+    "name": "{mdm}.{rho}...",
+    "extras": "capture.f",
+    "threads": 4,
+    "ppn": 8,
+    "jobs": 4,
+    "light": True,
+    "array": "-t",
+    "backend": "pbs",
+}
+
+# what each job of a sweep runs, MANIFEST is filled in, and the index comes
+# from the job array or from qsub -v INDEX=n
+SWEEP_BODY = """
+# which runs this index is, from the manifest
+INDEX=${PBS_ARRAYID:-${PBS_ARRAY_INDEX:-$INDEX}}
+set -- $(awk -F '\\t' -v i="$INDEX" '$1 == i {print $2}' MANIFEST)
+if [[ $# == 0 ]]; then
+    echo "no run $INDEX in MANIFEST"
+    exit 1
+fi
+
+# just the one, run its own submit script from its own work dir
+if [[ $# == 1 ]]; then
+    export PBS_O_WORKDIR=$1
+    cd $1
+    exec bash ./submit.sh
+fi
+
+# several packed onto this node, each already set up with its share of the
+# cores, so start them all and wait
+for WORK in "$@"; do
+    (export PBS_O_WORKDIR=$WORK; cd $WORK; bash ./submit.sh > packed.log 2>&1) &
+done
+wait
+"""
+
+##################
+# DEFINE CLASSES #
+##################
+class GridPoint:
+    '''one run of the sweep, with everything deploy.sh would be handed'''
+
+    def __init__(self, spec, mass, mdm, rho):
+        self.mass = mass
+        self.mdm = mdm
+        self.rho = rho
+        self.template = spec["template"].rstrip("/")
+        self.extras = spec["extras"]
+        self.threads = str(spec["threads"])
+        self.ppn = str(spec["ppn"])
+        self.light = spec["light"]
+        self.name = spec["name"].format(mass = exponent(mass), mdm = exponent(mdm), rho = exponent(rho))
+        # deploy.sh tacks the star mass onto the name
+        self.fullname = self.name + mass
+
+        # what set-inlist would set, plus anything else the spec asks for
+        self.overrides = namelist.run_overrides(self.name, mass, mdm, rho)
+        self.overrides.update(spec.get("inlist", {}))
+
+    def __str__(self):
+        return (self.fullname + ": M = " + self.mass + ", M_chi = " + self.mdm
+                + ", rho_chi = " + self.rho + ", " + self.threads + " threads, ppn " + self.ppn)
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def exponent(value):
+    '''the N of a fortran style 1dN, for naming runs, or the value itself'''
+    value = str(value)
+    if value.startswith("1d"):
+        return value[2:]
+    return value
+
+def read_spec(file_name):
+    '''read a sweep spec (json) and fill in the defaults'''
+    with open(file_name) as f:
+        spec = json.load(f)
+    for key in ["template", "masses", "dm_masses", "dm_densities"]:
+        if key not in spec:
+            raise KeyError("sweep spec " + file_name + " is missing '" + key + "'")
+    for key, value in DEFAULTS.items():
+        spec.setdefault(key, value)
+    return spec
+
+def grid(spec):
+    '''every grid point of a spec, star mass varying slowest'''
+    return [GridPoint(spec, str(mass), str(mdm), str(rho))
+            for mass, mdm, rho in itertools.product(spec["masses"], spec["dm_masses"], spec["dm_densities"])]
+
+def run(cmd, cwd = None, log = None):
+    '''run one command of a deploy, sending its chatter to log so parallel
+    deploys don't print over each other'''
+    proc = subprocess.run(cmd, cwd = cwd, stdout = log, stderr = subprocess.STDOUT)
+    if proc.returncode != 0:
+        raise RuntimeError("'" + " ".join(cmd) + "' failed in " + str(cwd))
+
+def copy_in(src, dst):
+    '''copy a file into a work dir, replacing whatever is at dst rather than
+    writing through it, since in a light work dir it's a link into the
+    shared copy'''
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if os.path.lexists(dst):
+        os.remove(dst)
+    shutil.copy(src, dst)
+
+def deploy(point, backend = None):
+    '''the steps of deploy.sh for one grid point, handing the run to backend
+    at the end if we have one'''
+    work = os.path.abspath(point.fullname)
+    if os.path.exists(work):
+        raise FileExistsError(work + " already exists")
+
+    # make a new MESA work dir, and bring in the templates
+    run(["new-star-work", "-l", work] if point.light else ["new-star-work", work])
+    inlists = os.path.join(point.template, "inlists")
+    copy_in(os.path.join(inlists, "history_columns.list"), work)
+    copy_in(os.path.join(inlists, "profile_columns.list"), work)
+    copy_in(os.path.join(point.template, "run_star_extras_src", point.extras),
+            os.path.join(work, "src", "run_star_extras.f"))
+
+    with open(os.path.join(work, "deploy.log"), "w") as log:
+        # fill out the inlist, and keep a copy of it with the logs
+        namelist.render(os.path.join(inlists, "inlist_template"), os.path.join(work, "inlist"), point.overrides)
+        os.makedirs(os.path.join(work, "LOGS", point.fullname))
+        shutil.copy(os.path.join(work, "inlist"), os.path.join(work, "LOGS", point.fullname))
+
+        # fill in the submit script
+        namelist.render(os.path.join(inlists, "submit_template.sh"), os.path.join(work, "submit.sh"),
+                        {"name": point.fullname, "threads": point.threads, "ppn": point.ppn}, submit = True)
+
+        # compile, or reuse an identical build from an earlier deploy
+        run(["cached-mk"], cwd = work, log = log)
+
+        # submit the job
+        if backend is not None:
+            log.write("submitted " + backend.submit(work) + "\n")
+    return point
+
+def pack(points, cores, threads):
+    '''plan which runs share a node: as many runs of about threads threads
+    as fit in cores, then the cores of each node split evenly between the
+    runs on it so none sit idle, returns the runs of each node and sets
+    their threads'''
+    per_node = max(1, cores // max(1, threads))
+    nodes = [points[i:i + per_node] for i in range(0, len(points), per_node)]
+    for node in nodes:
+        share, extra = divmod(cores, len(node))
+        for k, point in enumerate(node):
+            point.threads = str(max(1, share + (1 if k < extra else 0)))
+    return nodes
+
+def write_manifest(nodes, file_name):
+    '''one line per run, with the index of the job it goes in (its job
+    array index), its work dir and parameters'''
+    lines = ["# index\twork dir\tname\tmass\tdm mass\tdm density\tthreads\n"]
+    for i, node in enumerate(nodes):
+        for point in node:
+            lines.append("\t".join([str(i), os.path.abspath(point.fullname), point.fullname,
+                                    point.mass, point.mdm, point.rho, point.threads]) + "\n")
+    namelist.write_atomic(file_name, "".join(lines))
+
+def sweep_script(nodes, spec, name, manifest, array = True):
+    '''a submit script for every job of a sweep, with the PBS settings of
+    the template and each job looking itself up in the manifest, as one PBS
+    job array if asked'''
+    with open(os.path.join(spec["template"], "inlists", "submit_template.sh")) as f:
+        text = f.read()
+    text = namelist.set_submit(text, {"name": name, "threads": str(spec["threads"]), "ppn": str(spec["ppn"])})
+    header = [line for line in text.splitlines(True) if line.startswith("#!") or line.startswith("#PBS")]
+    if array:
+        header.append("#PBS " + spec["array"] + " 0-" + str(len(nodes) - 1) + "\n")
+    return "".join(header) + SWEEP_BODY.replace("MANIFEST", os.path.abspath(manifest))
+
+def submit_sweep(nodes, spec, spec_file, backend, array = True, submit = True):
+    '''write the manifest and sweep script for the runs we deployed, and
+    hand them to the scheduler, in one go if it's a job array, otherwise
+    once per node'''
+    name = "sweep-" + os.path.splitext(os.path.basename(spec_file))[0]
+    manifest = name + ".manifest"
+    script = name + ".sh"
+    write_manifest(nodes, manifest)
+    namelist.write_atomic(script, sweep_script(nodes, spec, name, manifest, array))
+    if submit:
+        if array:
+            backend.submit(os.getcwd(), script)
+        else:
+            for i in range(len(nodes)):
+                backend.submit(os.getcwd(), script, {"INDEX": i})
+    return script
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(description = "deploy every run of a sweep spec, several at a time")
+    parser.add_argument("spec", help="sweep spec (json) with the template dir, star masses, DM masses and DM densities", type=str)
+    parser.add_argument("-j", "--jobs", help="grid points to deploy at once, overrides the spec", type=int)
+    parser.add_argument("-n", "--dry-run", help="just list the grid points", action='store_true')
+    parser.add_argument("-a", "--array", help="submit the whole sweep as one PBS job array", action='store_true')
+    parser.add_argument("-p", "--pack", help="share each node between several runs, splitting its ppn cores between them", action='store_true')
+    parser.add_argument("-b", "--backend", help="where to run, pbs or local, overrides the spec", type=str)
+    parser.add_argument("--cores", help="cores the local backend can use, all of them by default", type=int)
+    parser.add_argument("--no-submit", help="set up and compile the runs, but don't qsub them", action='store_true')
+    args = parser.parse_args()
+
+    spec = read_spec(args.spec)
+    points = grid(spec)
+    if args.dry_run:
+        for point in points:
+            print(point)
+        return
+    jobs = args.jobs if args.jobs else spec["jobs"]
+    backend = backends.get_backend(args.backend or spec["backend"], args.cores)
+    if backend.name == "local" and (args.array or args.pack):
+        print("the local backend already shares the cores between runs, ignoring --array and --pack")
+        args.array = False
+        args.pack = False
+
+    # which runs go on which node, one each unless we're packing
+    if args.pack:
+        nodes = pack(points, int(spec["ppn"]), int(spec["threads"]))
+    else:
+        nodes = [[point] for point in points]
+    together = args.array or args.pack
+
+    print("Dispatching " + str(len(points)) + " feral hogs, " + str(jobs) + " at a time...")
+    failed = []
+    with ThreadPoolExecutor(max(1, jobs)) as pool:
+        futures = {pool.submit(deploy, point, None if args.no_submit or together else backend): point for point in points}
+        for future in as_completed(futures):
+            point = futures[future]
+            try:
+                future.result()
+                print("Hog #" + point.fullname + " has been notified of your location.")
+            except Exception as err:
+                failed.append(point)
+                print("Hog #" + point.fullname + " escaped: " + str(err), file = sys.stderr)
+
+    # submit every run that made it, together
+    if together:
+        nodes = [[point for point in node if point not in failed] for node in nodes]
+        nodes = [node for node in nodes if len(node) > 0]
+        if len(nodes) > 0:
+            script = submit_sweep(nodes, spec, args.spec, backend, args.array, not args.no_submit)
+            print("Herded " + str(len(points) - len(failed)) + " hogs onto " + str(len(nodes)) + " nodes with " + script
+                  + (", one job array." if args.array else "."))
+
+    # the local backend runs everything before we go
+    if backend.name == "local" and not args.no_submit:
+        print("Running on " + str(backend.cores) + " cores here, see local.log in each work dir...")
+        backend.wait()
+        if backend.failed > 0:
+            print(str(backend.failed) + " runs exited with an error", file = sys.stderr)
+
+    if len(failed) > 0:
+        print(str(len(failed)) + " of " + str(len(points)) + " deploys failed, see deploy.log in their work dirs", file = sys.stderr)
+        sys.exit(1)
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
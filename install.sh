@@ -20,6 +20,11 @@ for f in bin/*.py; do
         cp -p $f ${HOME}/.local/bin/$NAME
 done
 
+# keep the .py too, so the python scripts can import each other
+for f in bin/*.py; do
+        cp -p $f ${HOME}/.local/bin/.
+done
+
 # TRUEPATH=$"0"
 # echo "$PATH" | grep -q ${HOME}/.local/bin && TRUEPATH=$"1"
 
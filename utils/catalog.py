@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# a sqlite catalog of every run under a directory: its inlist parameters, how
+# far it got, and how many profiles it has, kept up to date by only looking
+# again at runs whose files changed since the last refresh
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_io as mio
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# the dispatcher side (namelist.py) lives in bin/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "bin"))
+import namelist
+
+CATALOG = ".mesa_catalog.sqlite"
+
+# how deep below the root to look for log directories, deep enough for
+# work/LOGS/name
+DEPTH = 3
+
+# a run whose history hasn't been written to for this long isn't running
+STALE_SECONDS = 3600
+
+SCHEMA = """
+create table if not exists runs (
+    path text primary key,
+    name text,
+    initial_mass real,
+    m_chi real,
+    rho_chi real,
+    status text,
+    profiles integer,
+    model_number integer,
+    star_age real,
+    star_mass real,
+    mtime real,
+    stamp text
+);
+create table if not exists params (
+    path text,
+    key text,
+    value text,
+    number real,
+    primary key (path, key)
+);
+"""
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def open_catalog(root = "."):
+    '''the catalog of the runs under root, made if it isn't there yet'''
+    conn = sqlite3.connect(os.path.join(root, CATALOG))
+    conn.executescript(SCHEMA)
+    return conn
+
+def find_runs(root = ".", depth = DEPTH):
+    '''every log directory under root (one holding history_<its name>.data),
+    relative to root'''
+    found = []
+    root = os.path.normpath(root)
+    base = root.count(os.sep)
+    for dirpath, dirnames, filenames in os.walk(root):
+        name = os.path.basename(dirpath)
+        if "history_" + name + ".data" in filenames:
+            found.append(os.path.relpath(dirpath, root))
+        # don't go into caches, or deeper than a work dir's LOGS
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        if dirpath.count(os.sep) - base >= depth:
+            dirnames[:] = []
+    return sorted(found)
+
+def inlist_file(log_dir):
+    '''the inlist a run was started with, the copy deploy leaves with the
+    logs, or the one in its work dir'''
+    for candidate in [os.path.join(log_dir, "inlist"), os.path.join(log_dir, "..", "..", "inlist")]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def stamp(log_dir):
+    '''size and modification time of everything we read about a run, if
+    this hasn't changed neither has the run'''
+    name = os.path.basename(os.path.normpath(log_dir))
+    parts = []
+    for f in [os.path.join(log_dir, "history_" + name + ".data"), os.path.join(log_dir, "profiles.index"), inlist_file(log_dir)]:
+        try:
+            st = os.stat(f)
+            parts.append(str(st.st_size) + ":" + str(st.st_mtime_ns))
+        except (OSError, TypeError):
+            parts.append("-")
+    return " ".join(parts)
+
+def count_profiles(log_dir):
+    '''profiles written so far, from profiles.index'''
+    try:
+        with open(os.path.join(log_dir, "profiles.index")) as f:
+            return max(0, sum(1 for line in f if line.strip()) - 1)
+    except OSError:
+        return 0
+
+def read_run(root, path):
+    '''everything the catalog holds about one run'''
+    log_dir = os.path.join(root, path)
+    name = os.path.basename(os.path.normpath(path))
+    history = os.path.join(log_dir, "history_" + name + ".data")
+    tail = mio.HistoryTail(history, ["model_number", "star_age", "star_mass"], from_end = True)
+    tail.poll()
+    last = tail.last
+
+    params = {}
+    inlist = inlist_file(log_dir)
+    if inlist is not None:
+        params = namelist.read_inlist(inlist)
+    return {
+        "path": path,
+        "name": name,
+        "initial_mass": namelist.number(params.get("initial_mass")),
+        "m_chi": namelist.number(params.get("x_ctrl(1)")),
+        "rho_chi": namelist.number(params.get("x_ctrl(2)")),
+        "profiles": count_profiles(log_dir),
+        "model_number": int(last["model_number"]) if "model_number" in last else None,
+        "star_age": float(last["star_age"]) if "star_age" in last else None,
+        "star_mass": float(last["star_mass"]) if "star_mass" in last else None,
+        "mtime": os.path.getmtime(history),
+        "params": params,
+    }
+
+def refresh(root = ".", conn = None):
+    '''bring the catalog up to date, only reading runs whose files changed,
+    returns how many runs were (re)read and how many went away'''
+    conn = conn or open_catalog(root)
+    known = dict(conn.execute("select path, stamp from runs"))
+    paths = find_runs(root)
+    changed = 0
+    for path in paths:
+        now = stamp(os.path.join(root, path))
+        if known.get(path) == now:
+            continue
+        run = read_run(root, path)
+        params = run.pop("params")
+        run["stamp"] = now
+        run["status"] = None
+        conn.execute("insert or replace into runs (" + ", ".join(run) + ") values ("
+                     + ", ".join("?" for key in run) + ")", list(run.values()))
+        conn.execute("delete from params where path = ?", (path,))
+        conn.executemany("insert into params values (?, ?, ?, ?)",
+                         [(path, key, value, namelist.number(value)) for key, value in params.items()])
+        changed += 1
+
+    # runs that aren't there anymore
+    gone = [path for path in known if path not in set(paths)]
+    for path in gone:
+        conn.execute("delete from runs where path = ?", (path,))
+        conn.execute("delete from params where path = ?", (path,))
+
+    # anything not written to in a while has stopped, one way or another
+    conn.execute("update runs set status = case when mtime > ? then 'running' else 'stopped' end",
+                 (time.time() - STALE_SECONDS,))
+    conn.commit()
+    return changed, len(gone)
+
+def fortran_numbers(query):
+    '''let queries use 1d8 for 1e8, like the inlists do, leaving quoted
+    strings (run names like '4.13...1d2') alone'''
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", query)
+    for k in range(0, len(parts), 2):
+        parts[k] = re.sub(r"\b(\d+(?:\.\d*)?)[dD]([+-]?\d+)\b", r"\1e\2", parts[k])
+    return "".join(parts)
+
+def select(query, root = ".", refresh_first = True):
+    '''paths (relative to root) of the runs matching an sql where clause over
+    the runs table, e.g. "m_chi = 1d8 and star_mass > 500", any inlist key
+    can be used as param('key')'''
+    conn = open_catalog(root)
+    if refresh_first:
+        refresh(root, conn)
+    sql = ("select path from runs where " + fortran_numbers(query) + " order by path")
+    # param('x_ctrl(3)') looks up any other inlist key, as a number if it is one
+    sql = re.sub(r"param\('([^']*)'\)",
+                 lambda m: "(select coalesce(number, value) from params where params.path = runs.path and key = '"
+                           + namelist.normalize(m.group(1)).replace("'", "''") + "')", sql)
+    return [row[0] for row in conn.execute(sql)]
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.MetavarTypeHelpFormatter)
+    parser.add_argument("query", nargs='?', help="sql condition on the runs, e.g. \"m_chi = 1d8 and star_mass > 500\"", type=str)
+    parser.add_argument("-r", "--root", help="directory the runs are under", type=str, default=".")
+    parser.add_argument("-l", "--long", help="print everything the catalog has on each run", action='store_true')
+    args = parser.parse_args()
+
+    conn = open_catalog(args.root)
+    changed, gone = refresh(args.root, conn)
+    if args.query is None:
+        count = conn.execute("select count(*) from runs").fetchone()[0]
+        print(str(count) + " runs in the catalog, " + str(changed) + " updated, " + str(gone) + " removed")
+        return
+
+    for path in select(args.query, args.root, refresh_first = False):
+        if args.long:
+            cur = conn.execute("select * from runs where path = ?", (path,))
+            names = [d[0] for d in cur.description]
+            print(json.dumps(dict(zip(names, cur.fetchone()))))
+        else:
+            print(path)
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -1,9 +1,6 @@
 #!/bin/bash
 
-RUNS=$(qstat | grep "ibania.*\R" | cut -d " " -f7 | cut -d "_" -f2)
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
 
-for f in $RUNS; do
-        echo $f
-        tail -n 1 $f/LOGS/$f/history* | cut -d ' ' -f 92-92
-        echo
-done
+# one qstat (shared for a few seconds), and only the last row of each history
+python ${DIR}/run-status.py -c star_age "$@"
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# picks the few rows of a long history line that actually show up at the
+# resolution it's saved at, using the min/max pyramids mesa_io keeps next to
+# the cached columns, so a million row history draws a few thousand points
+# and still looks the same, zoomed in or not
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_io as mio
+import numpy as np
+
+# how far (in output pixels) a bucket of rows may spread before we look
+# inside it
+TOLERANCE = 1.0
+
+# lines with fewer rows than this many per pixel across aren't worth it
+MIN_ROWS_PER_PIXEL = 4
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def extent(p):
+    '''spread of each column of p, ignoring nans (0 if all of them are)'''
+    return np.nan_to_num(np.fmax.reduce(p, axis = 0) - np.fmin.reduce(p, axis = 0))
+
+def select_rows(xpyr, ypyr, n, to_pixels, box, tol = TOLERANCE):
+    '''sorted rows of an n row line to draw, from the pyramids of its x and
+    y columns: a bucket of rows whose first, last and extreme rows are within
+    tol pixels across or up and down (or lie wholly outside box, (x0, y0, x1,
+    y1) in pixels) is drawn
+    as just those rows, any other is split into the two buckets below it,
+    to_pixels(rows) gives the output pixel (x, y) of rows'''
+    levels = mio.pyramid_levels(n)
+    k = len(levels) - 1
+    active = np.arange(levels[k][1])
+    keep = []
+    while len(active) > 0:
+        offset, count, bucket = levels[k]
+        first = active*bucket
+        last = np.minimum(first + bucket, n) - 1
+        rows = np.vstack([first, last, xpyr[offset + active, 0], xpyr[offset + active, 1],
+                          ypyr[offset + active, 0], ypyr[offset + active, 1]])
+        px, py = to_pixels(rows.ravel())
+        px = px.reshape(rows.shape)
+        py = py.reshape(rows.shape)
+        # a bucket within one pixel column (or row) covers the same pixels
+        # as a line through its first, last and extreme rows does
+        small = (extent(px) <= tol) | (extent(py) <= tol)
+        outside = ((np.fmax.reduce(px, axis = 0) < box[0]) | (np.fmin.reduce(px, axis = 0) > box[2])
+                   | (np.fmax.reduce(py, axis = 0) < box[1]) | (np.fmin.reduce(py, axis = 0) > box[3]))
+        done = small | outside
+        keep.append(rows[:, done].ravel())
+
+        # the finest buckets that still spread out get every row drawn
+        if k == 0:
+            for a, b in zip(first[~done], last[~done]):
+                keep.append(np.arange(a, b + 1))
+            break
+        k -= 1
+        split = active[~done]
+        active = np.concatenate([2*split, 2*split + 1])
+        active = np.sort(active[active < levels[k][1]])
+    if len(keep) == 0:
+        return np.zeros(0, dtype = int)
+    return np.unique(np.concatenate(keep))
+
+def worth_it(n, pixels):
+    '''is an n row line across this many pixels long enough to bother'''
+    return n > MIN_ROWS_PER_PIXEL*pixels
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# finds the moments in a run worth annotating on a plot (hitting the ZAMS,
+# growing past some mass or radius) with numpy rather than python loops
+
+####################
+# IMPORT LIBRARIES #
+####################
+import numpy as np
+
+# milestones we annotate, and where they fall in the magma palette (/12)
+MASS_MILESTONES = [(100.0, 2), (200.0, 3), (300.0, 4), (400.0, 5), (500.0, 6), (600.0, 7),
+                   (700.0, 8), (800.0, 9), (900.0, 10), (950.0, 10), (1000.0, 11)]
+RADIUS_MILESTONES = [(1.0, 2), (3.0, 3), (5.0, 4), (10.0, 5), (30.0, 6), (50.0, 7),
+                     (100.0, 8), (300.0, 9), (500.0, 10), (1000.0, 11)]
+
+# a star is on the ZAMS once nuclear burning makes this much of L
+ZAMS_NUC_FRAC = 0.9
+ZAMS_MIN_AGE = 50.0
+
+# how close counts as hitting a milestone, even without crossing it
+TOL = 0.1
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def first_crossing(x, level, tol = TOL):
+    '''first row where x comes within tol of level or steps across it, -1 if
+    it never does'''
+    x = np.asarray(x)
+    if len(x) == 0:
+        return -1
+    d = x - level
+    hit = np.abs(d) < tol
+    hit[1:] |= np.signbit(d[1:]) != np.signbit(d[:-1])
+    if not hit.any():
+        return -1
+    return int(np.argmax(hit))
+
+def milestones(x, levels):
+    '''rows where x first reaches each of levels, as (row, color) pairs'''
+    found = []
+    for level, color in levels:
+        row = first_crossing(x, level)
+        if row >= 0:
+            found.append((row, color))
+    return found
+
+def zams(history):
+    '''row where the star settles onto the zero age main sequence, as a one
+    element list so it annotates like any other event, empty if it never does'''
+    nuc_frac = 10**(np.asarray(history.log_Lnuc) - np.asarray(history.log_L))
+    on = (nuc_frac > ZAMS_NUC_FRAC) & (np.asarray(history.star_age) > ZAMS_MIN_AGE)
+    if not on.any():
+        return []
+    return [(int(np.argmax(on)), None)]
+
+def find_events(history, kind):
+    '''event table of one kind ('ZAMS', 'mass' or 'radius') for a history'''
+    if kind == 'ZAMS':
+        return zams(history)
+    if kind == 'mass':
+        return milestones(history.star_mass, MASS_MILESTONES)
+    if kind == 'radius':
+        return milestones(history.radius, RADIUS_MILESTONES)
+    raise KeyError("'" + str(kind) + "' is not a kind of event.")
+
+def event_label(history, kind, row):
+    '''text to put next to an event'''
+    if kind == 'ZAMS':
+        return str(round(history.star_age[row])) + " yr " + str(round(history.radius[row], 2)) + " $R_{\\odot}$"
+    if kind == 'mass':
+        return str(round(history.star_mass[row])) + " $M_{\\odot}$"
+    return str(round(history.radius[row])) + " $R_{\\odot}$"
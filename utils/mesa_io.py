@@ -0,0 +1,674 @@
+#!/usr/bin/env python
+# helpers for getting MESA output off the disk and into numpy as fast as
+# possible, used by tuya.py
+
+####################
+# IMPORT LIBRARIES #
+####################
+import numpy as np
+import json
+import os
+import shutil
+import tempfile
+import fcntl
+
+# where the binary column caches live, relative to the LOGS directory
+CACHE_DIR = ".tuya_cache"
+
+# rows in the finest buckets of a min/max pyramid, each level up doubles it
+PYRAMID_BUCKET = 4
+
+# what the row index of a history holds for each row it keeps, and the
+# file it's kept in next to the cached columns
+INDEX_TYPE = [("model_number", np.int64), ("star_age", np.float64), ("offset", np.int64)]
+ROW_INDEX = "rows.idx.npy"
+
+# prefixes mr.MesaData understands for log10 and ln versions of a column
+LOG_PREFIXES = ["log_", "log", "lg_", "lg"]
+LN_PREFIXES = ["ln_", "ln"]
+
+##################
+# DEFINE CLASSES #
+##################
+class ColumnData:
+    '''stand in for mr.MesaData that holds each column as its own array,
+    columns can be plain arrays or memory mapped .npy files that are only
+    opened the first time they are asked for'''
+
+    def __init__(self, file_name, bulk_names, header_data, columns = None, col_dir = None, dtype = None,
+                 span = None):
+        self.file_name = file_name
+        self.bulk_names = tuple(bulk_names)
+        self.header_data = header_data
+        self.header_names = list(header_data.keys())
+        self.columns = {} if columns is None else columns
+        self.col_dir = col_dir
+        self.dtype = dtype
+        self.pyramids = {}
+        # just the rows in this stretch of the file (see read_columns)
+        self.span = span
+
+    def in_data(self, key):
+        return key in self.bulk_names
+
+    def in_header(self, key):
+        return key in self.header_data
+
+    def has_columns(self, keys):
+        '''are all of these columns loaded or sitting in the cache'''
+        for key in keys:
+            if key in self.columns:
+                continue
+            if self.col_dir is None or not os.path.exists(col_path(self.col_dir, key)):
+                return False
+        return True
+
+    def column(self, key):
+        '''get a raw column, from memory, the cache, or as a last resort the
+        text file itself if nobody asked for it up front'''
+        if key not in self.columns:
+            if self.col_dir is not None and os.path.exists(col_path(self.col_dir, key)):
+                col = cast(np.load(col_path(self.col_dir, key), mmap_mode='r'), self.dtype)
+            else:
+                col = read_columns(self.file_name, [key], self.dtype, self.span).columns[key]
+            self.columns[key] = col
+        return self.columns[key]
+
+    def data(self, key):
+        '''get a column by name, falling back on log/ln versions of it the
+        same way mr.MesaData does'''
+        if self.in_data(key):
+            return self.column(key)
+        for prefix in LOG_PREFIXES:
+            if self.in_data(prefix + key):
+                return 10**self.column(prefix + key)
+        for prefix in LN_PREFIXES:
+            if self.in_data(prefix + key):
+                return np.exp(self.column(prefix + key))
+        raise KeyError("'" + str(key) + "' is not a valid data type.")
+
+    def pyramid(self, key):
+        '''min/max pyramid of a column (see build_pyramid), out of the cache
+        if it's there, and put there if we can, for the same log/ln fallbacks
+        as data(), which don't change which rows are the extremes'''
+        names = resolve_columns([key], self.bulk_names)
+        if len(names) == 0:
+            raise KeyError("'" + str(key) + "' is not a valid data type.")
+        name = names[0]
+        if name in self.pyramids:
+            return self.pyramids[name]
+
+        pyr = None
+        file_name = None if self.col_dir is None else pyramid_path(self.col_dir, name)
+        if file_name is not None and os.path.exists(file_name):
+            try:
+                pyr = np.load(file_name, mmap_mode='r')
+            except OSError:
+                # a newer entry replaced this one since we looked
+                pass
+        if pyr is None or len(pyr) != pyramid_size(len(self)):
+            pyr = build_pyramid(self.column(name))
+            if file_name is not None:
+                try:
+                    fd, tmp = tempfile.mkstemp(prefix = "." + name + ".", suffix = ".npy", dir = self.col_dir)
+                    with os.fdopen(fd, "wb") as f:
+                        np.save(f, pyr)
+                    os.chmod(tmp, 0o664)
+                    os.replace(tmp, file_name)
+                except OSError:
+                    pass
+        self.pyramids[name] = pyr
+        return pyr
+
+    def header(self, key):
+        if not self.in_header(key):
+            raise KeyError("'" + str(key) + "' is not a valid header name.")
+        return self.header_data[key]
+
+    def __getattr__(self, name):
+        # only called when normal lookup fails, so this mimics mr.MesaData
+        if name.startswith('__') or name in ('columns', 'bulk_names', 'header_data'):
+            raise AttributeError(name)
+        if self.in_header(name) and not self.in_data(name):
+            return self.header(name)
+        try:
+            return self.data(name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        for col in self.columns.values():
+            return len(col)
+        if len(self.bulk_names) == 0:
+            return 0
+        if self.in_data("model_number"):
+            return len(self.column("model_number"))
+        return len(self.column(self.bulk_names[0]))
+
+class HistoryTail:
+    '''follows the history file of a job that is still running, remembering
+    how far into the file it has parsed so each poll only reads the rows
+    appended since the last one, columns are picked by header name'''
+
+    def __init__(self, file_name, columns = None, from_end = False, start = None):
+        self.file_name = file_name
+        self.wanted = columns
+        # start from the last row already written instead of the first, or
+        # after the last whole row before byte start if the rows up to there
+        # were already read some other way
+        self.from_end = from_end
+        self.start = start
+        self.reset()
+
+    def reset(self):
+        self.offset = None
+        self.header_data = {}
+        self.bulk_names = []
+        self.names = []
+        self.usecols = []
+        self.types = None
+        self.chunks = []
+        self.last = {}
+
+    def poll(self):
+        '''parse any newly appended rows, returns how many there were'''
+        try:
+            size = os.stat(self.file_name).st_size
+        except OSError:
+            return 0
+
+        # the file got shorter, so the job was restarted from scratch
+        if self.offset is not None and size < self.offset:
+            self.reset()
+        if self.offset is not None and size == self.offset:
+            return 0
+
+        with open(self.file_name, 'rb') as f:
+            if self.offset is None:
+                header = [f.readline().decode() for k in range(6)]
+                if len(header[5].strip()) == 0:
+                    # MESA hasn't finished writing the header yet
+                    return 0
+                self.header_data = dict(zip(header[1].split(), [parse_value(w) for w in header[2].split()]))
+                self.bulk_names = header[5].split()
+                if self.wanted is None:
+                    self.names = list(self.bulk_names)
+                else:
+                    self.names = resolve_columns(self.wanted, self.bulk_names)
+                if "model_number" in self.bulk_names and "model_number" not in self.names:
+                    self.names.append("model_number")
+                self.usecols = [self.bulk_names.index(name) for name in self.names]
+                self.offset = f.tell()
+                if self.from_end:
+                    self.offset = max(self.offset, last_line_start(f, size))
+                elif self.start is not None:
+                    self.offset = max(self.offset, last_line_end(f, min(self.start, size)))
+
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+
+        # only take whole lines, a partial last line gets picked up next time
+        end = chunk.rfind(b'\n') + 1
+        lines = chunk[:end].decode().splitlines()
+        lines = [line for line in lines if len(line.strip()) > 0]
+        self.offset += end
+        if len(lines) == 0:
+            return 0
+
+        if self.types is None:
+            self.types = column_types(self.names, self.usecols, lines[0].split())
+        table = np.loadtxt(lines, dtype = self.types, usecols = self.usecols, ndmin = 1)
+        self.chunks.append(table)
+        self.last = {name: table[name][-1] for name in self.names}
+        return len(table)
+
+    def columns(self):
+        '''everything parsed so far, with restarts scrubbed out'''
+        if len(self.chunks) == 0:
+            return {name: np.zeros(0) for name in self.names}
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        cols = {name: self.chunks[0][name] for name in self.names}
+        if "model_number" in cols:
+            cols = remove_backups(cols)
+        return cols
+
+    def drain(self):
+        '''like columns, but forgets the rows once handed over, for callers
+        that keep their own copy'''
+        cols = self.columns()
+        self.chunks = []
+        return cols
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def last_line_start(f, size, block = 65536):
+    '''byte offset of the start of the last complete line of a file opened in
+    binary, found by reading backwards from the end a block at a time'''
+    # ignore a partial line that is still being written
+    f.seek(max(size - block, 0))
+    tail = f.read(size - f.tell())
+    end = size - (len(tail) - tail.rfind(b'\n') - 1) if b'\n' in tail else size
+    pos = end - 1
+    while pos > 0:
+        start = max(pos - block, 0)
+        f.seek(start)
+        buf = f.read(pos - start)
+        nl = buf.rfind(b'\n')
+        if nl >= 0:
+            return start + nl + 1
+        pos = start
+    return 0
+
+def last_line_end(f, size, block = 65536):
+    '''byte offset just past the last newline in the first size bytes of a
+    file opened in binary, where a reader that stopped at size left off'''
+    pos = size
+    while pos > 0:
+        start = max(pos - block, 0)
+        f.seek(start)
+        nl = f.read(pos - start).rfind(b'\n')
+        if nl >= 0:
+            return start + nl + 1
+        pos = start
+    return 0
+
+def col_path(col_dir, key):
+    '''file holding a single cached column'''
+    return os.path.join(col_dir, key + ".npy")
+
+def pyramid_path(col_dir, key):
+    '''file holding the min/max pyramid of a cached column'''
+    return os.path.join(col_dir, key + ".pyr.npy")
+
+def pyramid_levels(n):
+    '''(first row in the pyramid, buckets, rows per bucket) of each level of
+    the pyramid of an n row column, finest first'''
+    levels = []
+    offset = 0
+    bucket = PYRAMID_BUCKET
+    while True:
+        count = -(-n//bucket)
+        levels.append((offset, count, bucket))
+        offset += count
+        if count <= 1:
+            return levels
+        bucket *= 2
+
+def pyramid_size(n):
+    offset, count, bucket = pyramid_levels(n)[-1]
+    return offset + count
+
+def build_pyramid(col):
+    '''row of the smallest and largest value in every bucket of rows of a
+    column, for buckets of PYRAMID_BUCKET rows, twice that, and so on up to
+    one bucket for the whole thing, all the levels stacked into one (rows, 2)
+    array, nans are never picked while there's anything else'''
+    col = np.asarray(col, dtype = float)
+    n = len(col)
+    levels = pyramid_levels(n)
+    pyr = np.zeros((pyramid_size(n), 2), dtype = np.int32 if n < 2**31 else np.int64)
+    if n == 0:
+        return pyr
+    low = np.where(np.isnan(col), np.inf, col)
+    high = np.where(np.isnan(col), -np.inf, col)
+
+    # the finest level straight from the column, padded out to whole buckets
+    offset, count, bucket = levels[0]
+    pad = count*bucket - n
+    pyr[:count, 0] = np.argmin(np.append(low, np.full(pad, np.inf)).reshape(count, bucket), axis = 1)
+    pyr[:count, 1] = np.argmax(np.append(high, np.full(pad, -np.inf)).reshape(count, bucket), axis = 1)
+    pyr[:count] += (np.arange(count)*bucket)[:, None]
+
+    # and every level after from pairs of buckets in the one before
+    for (prev, prev_count, b), (offset, count, bucket) in zip(levels[:-1], levels[1:]):
+        rows = pyr[prev:prev + prev_count]
+        if prev_count % 2 == 1:
+            rows = np.vstack([rows, rows[-1:]])
+        lo = rows[:, 0].reshape(count, 2)
+        hi = rows[:, 1].reshape(count, 2)
+        pyr[offset:offset + count, 0] = np.where(low[lo[:, 1]] < low[lo[:, 0]], lo[:, 1], lo[:, 0])
+        pyr[offset:offset + count, 1] = np.where(high[hi[:, 1]] > high[hi[:, 0]], hi[:, 1], hi[:, 0])
+    return pyr
+
+def cast(col, dtype):
+    '''store float columns as dtype, leave everything else alone'''
+    if dtype is None or col.dtype.kind != 'f':
+        return col
+    return col.astype(dtype)
+
+def cache_key(file_name):
+    '''name of the cache entry for a file, changes whenever the file does'''
+    st = os.stat(file_name)
+    return os.path.basename(file_name) + "." + str(st.st_size) + "." + str(st.st_mtime_ns)
+
+def parse_value(word):
+    '''turn a header entry into an int, float, or string'''
+    if word.startswith('"'):
+        return word.strip('"')
+    try:
+        return int(word)
+    except ValueError:
+        pass
+    try:
+        return float(word.replace('D', 'E').replace('d', 'e'))
+    except ValueError:
+        return word
+
+def read_header(f):
+    '''read the six header lines of a MESA log file, leaving f sitting on the
+    first row of data'''
+    f.readline()
+    header_names = f.readline().split()
+    header_data = dict(zip(header_names, [parse_value(w) for w in f.readline().split()]))
+    f.readline()
+    f.readline()
+    bulk_names = f.readline().split()
+    return header_data, bulk_names
+
+def column_types(names, usecols, first, dtype = None):
+    '''numpy record type for the named columns, integer columns are the ones
+    that are all digits in the first row of data'''
+    types = []
+    for name, i in zip(names, usecols):
+        if i < len(first) and first[i].lstrip('-+').isdigit():
+            types.append((name, np.int64))
+        else:
+            types.append((name, np.float64 if dtype is None else dtype))
+    return types
+
+def resolve_columns(keys, bulk_names):
+    '''which columns actually in the file we need to parse to answer for each
+    of keys, including the log versions mr.MesaData would fall back on'''
+    found = []
+    for key in keys:
+        for name in [key] + [p + key for p in LOG_PREFIXES] + [p + key for p in LN_PREFIXES]:
+            if name in bulk_names:
+                if name not in found:
+                    found.append(name)
+                break
+    return found
+
+def backup_rows(model):
+    '''which rows a later restart or retry didn't write over, any row whose
+    model number is smaller than every model number after it'''
+    keep = np.ones(len(model), dtype = bool)
+    if len(model) < 2:
+        return keep
+    future_min = np.minimum.accumulate(model[::-1])[::-1]
+    keep[:-1] = model[:-1] < future_min[1:]
+    return keep
+
+def remove_backups(columns):
+    '''drop rows that a later restart or retry wrote over'''
+    keep = backup_rows(columns["model_number"])
+    if keep.all():
+        return columns
+    return {key: np.ascontiguousarray(col[keep]) for key, col in columns.items()}
+
+def read_columns(file_name, columns = None, dtype = None, span = None):
+    '''parse only the named columns out of a MESA log file, the rest are never
+    converted to numbers, optionally storing floats as dtype (e.g. float32),
+    span = (start, end, last model) parses just the history rows between
+    those byte offsets, up to that model (see row_index)'''
+    with open(file_name) as f:
+        header_data, bulk_names = read_header(f)
+        if columns is None:
+            wanted = list(bulk_names)
+        else:
+            wanted = resolve_columns(columns, bulk_names)
+        # histories need model_number to scrub restarts
+        is_history = "model_number" in bulk_names
+        if is_history and "model_number" not in wanted:
+            wanted.append("model_number")
+
+        if span is None:
+            start = f.tell()
+            first = f.readline().split()
+            f.seek(start)
+            rows = f
+        else:
+            f.seek(span[0])
+            rows = f.read(span[1] - span[0]).splitlines()
+            first = rows[0].split() if len(rows) > 0 else []
+        usecols = [bulk_names.index(name) for name in wanted]
+        types = column_types(wanted, usecols, first, dtype)
+
+        if len(wanted) == 0 or len(first) == 0:
+            table = np.zeros(0, dtype = types)
+        else:
+            table = np.loadtxt(rows, dtype = types, usecols = usecols, ndmin = 1)
+
+    cols = {name: np.ascontiguousarray(table[name]) for name in wanted}
+    if is_history:
+        cols = remove_backups(cols)
+    if span is not None and is_history:
+        # rows after the last one we wanted belong to a later stretch
+        keep = cols["model_number"] <= span[2]
+        cols = {name: np.ascontiguousarray(col[keep]) for name, col in cols.items()}
+    return ColumnData(file_name, bulk_names, header_data, columns = cols, dtype = dtype, span = span)
+
+def row_offsets(data):
+    '''byte offset (from the start of data) of every line in data that
+    isn't empty, up to the last complete one'''
+    buf = np.frombuffer(data, dtype = np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    return starts[ends > starts]
+
+def build_row_index(file_name):
+    '''model number, star age and byte offset of every row a history keeps
+    (restarts scrubbed out), None if the file can't be indexed'''
+    with open(file_name, "rb") as f:
+        header = [f.readline() for k in range(6)]
+        bulk_names = header[5].decode().split()
+        if "model_number" not in bulk_names or "star_age" not in bulk_names:
+            return None
+        start = f.tell()
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]
+    offsets = row_offsets(data) + start
+    usecols = [bulk_names.index("model_number"), bulk_names.index("star_age")]
+    table = np.loadtxt(data.decode().splitlines(), usecols = usecols, ndmin = 2)
+    if len(table) != len(offsets):
+        return None
+    keep = backup_rows(table[:, 0])
+    index = np.zeros(int(keep.sum()), dtype = INDEX_TYPE)
+    index["model_number"] = table[keep, 0]
+    index["star_age"] = table[keep, 1]
+    index["offset"] = offsets[keep]
+    return index
+
+def row_index(file_name, cache = True):
+    '''the index of a history's rows (see build_row_index), kept next to the
+    column cache when we can'''
+    if not cache:
+        return build_row_index(file_name)
+    col_dir = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR, cache_key(file_name))
+    try:
+        return np.load(os.path.join(col_dir, ROW_INDEX), mmap_mode='r')
+    except (OSError, ValueError):
+        pass
+    key = cache_key(file_name)
+    # the index lives in the file's cache entry, so make sure it has one
+    if not os.path.isdir(col_dir):
+        load_history(file_name, cache = True, columns = ["model_number", "star_age"])
+    index = build_row_index(file_name)
+    # only keep it if the file didn't grow while we read it
+    if index is not None and cache_key(file_name) == key and os.path.isdir(col_dir):
+        try:
+            fd, tmp = tempfile.mkstemp(prefix = ".index.", suffix = ".npy", dir = col_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, index)
+            os.chmod(tmp, 0o664)
+            os.replace(tmp, os.path.join(col_dir, ROW_INDEX))
+        except OSError:
+            pass
+    return index
+
+def load_window(file_name, age_range, cache = True, columns = None, dtype = None):
+    '''just the rows of a history with star_age in age_range = (min, max),
+    sliced out of the column cache if it has everything, or else parsed
+    straight from that stretch of the file, found with the row index'''
+    index = row_index(file_name, cache)
+    if index is None:
+        data = load_history(file_name, cache, columns, dtype)
+        names = resolve_columns(columns or data.bulk_names, data.bulk_names)
+        rows = (np.asarray(data.star_age) >= age_range[0]) & (np.asarray(data.star_age) <= age_range[1])
+        return ColumnData(file_name, data.bulk_names, data.header_data, dtype = dtype,
+                          columns = {name: data.column(name)[rows] for name in names + ["model_number"]})
+
+    lo = int(np.searchsorted(index["star_age"], age_range[0], side = "left"))
+    hi = int(np.searchsorted(index["star_age"], age_range[1], side = "right"))
+    size = os.path.getsize(file_name)
+    if hi <= lo:
+        span = (size, size, -1)
+    else:
+        end = int(index["offset"][hi]) if hi < len(index) else size
+        span = (int(index["offset"][lo]), end, int(index["model_number"][hi - 1]))
+
+    # the cache already has the columns, so slicing it costs nothing
+    if cache:
+        col_dir = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR, cache_key(file_name))
+        data = open_cache(col_dir, file_name, dtype)
+        if data is not None and data.has_columns(resolve_columns(columns or data.bulk_names, data.bulk_names)) \
+           and map_columns(data, columns) is not None and len(data) == len(index):
+            names = resolve_columns(columns or data.bulk_names, data.bulk_names)
+            return ColumnData(file_name, data.bulk_names, data.header_data, dtype = dtype, span = span,
+                              columns = {name: data.column(name)[lo:hi] for name in names + ["model_number"]})
+    return read_columns(file_name, columns, dtype, span)
+
+def open_cache(col_dir, file_name, dtype = None):
+    '''open a finished cache entry, returns None if it isn't usable'''
+    try:
+        with open(os.path.join(col_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return ColumnData(file_name, meta["bulk_names"], meta["header_data"], col_dir = col_dir, dtype = dtype)
+
+def map_columns(data, columns = None):
+    '''memory map the columns we'll want out of a cache entry now, rather than
+    the first time they're asked for, since a mapping stays readable after a
+    newer entry has replaced this one, returns None if it's already gone'''
+    names = resolve_columns(columns or data.bulk_names, data.bulk_names)
+    if data.in_data("model_number") and "model_number" not in names:
+        names.append("model_number")
+    try:
+        for name in names:
+            if name not in data.columns:
+                data.columns[name] = cast(np.load(col_path(data.col_dir, name), mmap_mode='r'), data.dtype)
+    except OSError:
+        return None
+    return data
+
+def write_cache(data, cache_root, key):
+    '''dump the parsed columns to .npy, a new entry is written in a private
+    scratch dir and published with a single rename, and columns added to an
+    existing entry are each renamed into place, so nobody ever sees a half
+    written file'''
+    col_dir = os.path.join(cache_root, key)
+    if os.path.isdir(col_dir):
+        for name, col in data.columns.items():
+            if os.path.exists(col_path(col_dir, name)):
+                continue
+            fd, tmp = tempfile.mkstemp(prefix = "." + name + ".", suffix = ".npy", dir = col_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, col)
+            os.chmod(tmp, 0o664)
+            os.replace(tmp, col_path(col_dir, name))
+        return
+
+    tmp = tempfile.mkdtemp(prefix = "." + key + ".", dir = cache_root)
+    try:
+        for name, col in data.columns.items():
+            np.save(col_path(tmp, name), col)
+        meta = {"source": os.path.basename(data.file_name),
+                "bulk_names": list(data.bulk_names),
+                "header_data": data.header_data}
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        # mkdtemp is owner only, let the rest of the group share the cache
+        os.chmod(tmp, 0o775)
+        os.rename(tmp, col_dir)
+    except OSError:
+        # somebody else published first (or we ran out of room), either way
+        # the scratch copy is no use to anyone
+        shutil.rmtree(tmp, ignore_errors = True)
+
+def prune_cache(cache_root, file_name, key):
+    '''remove stale entries left over from earlier versions of a file'''
+    base = os.path.basename(file_name) + "."
+    for entry in os.listdir(cache_root):
+        if entry.startswith(base) and entry != key and not entry.endswith(".lock"):
+            # anyone still reading an old entry keeps their mapping alive
+            shutil.rmtree(os.path.join(cache_root, entry), ignore_errors = True)
+
+def load_history(file_name, cache = True, columns = None, dtype = None, age_range = None):
+    '''load a history file, via the binary column cache next to it when we
+    can, parsing (and caching) only the columns we don't have yet, or just
+    the rows with star_age in age_range = (min, max)'''
+    if age_range is not None:
+        return load_window(file_name, age_range, cache, columns, dtype)
+    if not cache:
+        return read_columns(file_name, columns, dtype)
+
+    cache_root = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR)
+    key = cache_key(file_name)
+    col_dir = os.path.join(cache_root, key)
+
+    # fast path, somebody already did the work
+    data = open_cache(col_dir, file_name, dtype)
+    if data is not None and data.has_columns(resolve_columns(columns or data.bulk_names, data.bulk_names)) \
+       and map_columns(data, columns) is not None:
+        return data
+
+    # we need to be able to write next to the run to keep a cache there
+    try:
+        os.makedirs(cache_root, exist_ok = True)
+        lock_fd = os.open(os.path.join(cache_root, os.path.basename(file_name) + ".lock"),
+                          os.O_RDONLY | os.O_CREAT, 0o644)
+    except OSError:
+        print("can't write a cache for " + file_name + ", reading it directly...")
+        return read_columns(file_name, columns, dtype)
+
+    # only one tuya per file does the parse, the rest wait and then map it
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        data = open_cache(col_dir, file_name, dtype)
+        if data is None:
+            missing = columns
+        else:
+            wanted = resolve_columns(columns or data.bulk_names, data.bulk_names)
+            missing = [name for name in wanted if not data.has_columns([name])]
+        if data is None or len(missing) > 0:
+            print("caching history columns for " + file_name + "...")
+            new = read_columns(file_name, missing)
+
+            # a running job may have appended while we parsed, and then what
+            # we have doesn't match the key, so don't cache it
+            if cache_key(file_name) != key:
+                return read_columns(file_name, columns, dtype)
+            try:
+                write_cache(new, cache_root, key)
+                prune_cache(cache_root, file_name, key)
+            except OSError:
+                pass
+            data = open_cache(col_dir, file_name, dtype)
+            if data is None:
+                data = ColumnData(file_name, new.bulk_names, new.header_data, dtype = dtype)
+
+            # whatever we couldn't write out (somebody else's entry that we
+            # aren't allowed to add to) we just keep in memory
+            for name, col in new.columns.items():
+                if not data.has_columns([name]):
+                    data.columns[name] = cast(col, dtype)
+
+        # nobody prunes while we hold the lock, so map what we'll use now
+        if data.col_dir is not None:
+            data = map_columns(data, columns) or read_columns(file_name, columns, dtype)
+    finally:
+        os.close(lock_fd)
+    return data
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# one object per MESA log directory, so tuya.py only ever touches each file
+# it needs once
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_reader as mr
+import mesa_io as mio
+import events as ev
+import numpy as np
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+##################
+# DEFINE CLASSES #
+##################
+class ProfileCache:
+    '''least recently used store of parsed profiles, shared between every run
+    and every plot so a profile is parsed once no matter how many flags want
+    it, bounded by a memory budget in MB'''
+
+    def __init__(self, max_mb = 2048):
+        self.max_bytes = int(max_mb * 2**20)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, load):
+        '''return the profile stored under key, calling load() to parse it
+        if we don't have it'''
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        data = load()
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        '''store a profile that was parsed somewhere else'''
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        size = data_nbytes(data)
+        self.entries[key] = (data, size)
+        self.nbytes += size
+
+        # drop the stalest profiles until we fit, but always keep the newest
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            old_key, (old_data, old_size) = self.entries.popitem(last = False)
+            self.nbytes -= old_size
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def report(self):
+        return ("profile cache: " + str(self.hits) + " hits, " + str(self.misses) + " misses, "
+                + str(self.evictions) + " evicted, " + str(round(self.nbytes / 2**20, 1)) + " MB held")
+
+class MesaRun:
+    '''everything we know about a single run: the history (read once, through
+    the column cache), the profile index, and lazy access to the profiles'''
+
+    def __init__(self, log_path, cache = True, prof_cache = None,
+                 hist_columns = None, prof_columns = None, dtype = None, history = None,
+                 age_range = None):
+        self.log_path = log_path
+        self.prof_cache = ProfileCache() if prof_cache is None else prof_cache
+
+        # only these columns get parsed, None means all of them
+        self.prof_columns = prof_columns
+        self.dtype = dtype
+
+        self.name = os.path.basename(os.path.normpath(log_path))
+        self.history_file = history_file(log_path)
+        if history is None:
+            history = mio.load_history(self.history_file, cache = cache,
+                                       columns = hist_columns, dtype = dtype, age_range = age_range)
+        self.history = history
+        self.event_tables = {}
+        self.rows = None
+
+        # profiles.index maps model numbers to profile numbers
+        self.index = mr.MesaProfileIndex(file_name = os.path.join(log_path, "profiles.index"))
+        self.model_numbers = self.index.model_numbers
+        self.profile_numbers = self.index.profile_numbers
+
+        # only the profiles written inside the stretch of history we have
+        if age_range is not None:
+            model = np.asarray(self.history.model_number)
+            models = np.asarray(self.model_numbers)
+            inside = np.zeros(len(models), dtype = bool)
+            if len(model) > 0:
+                inside = (models >= model[0]) & (models <= model[-1])
+            self.model_numbers = models[inside]
+            self.profile_numbers = np.asarray(self.profile_numbers)[inside]
+
+    def profile_rows(self):
+        '''history row each profile was written at, joined on model number
+        (histories are scrubbed so model_number only ever increases)'''
+        if self.rows is None:
+            model = np.asarray(self.history.model_number)
+            rows = np.searchsorted(model, self.model_numbers)
+            self.rows = np.clip(rows, 0, max(len(model) - 1, 0))
+        return self.rows
+
+    def events(self, kind):
+        '''rows worth annotating (see events.py), found once per run'''
+        if kind not in self.event_tables:
+            self.event_tables[kind] = ev.find_events(self.history, kind)
+        return self.event_tables[kind]
+
+    def profile_file_with_model_number(self, model_number):
+        return self.profile_file(self.profile_with_model_number(model_number))
+
+    def profile_file(self, profile_number):
+        return os.path.join(self.log_path, "profile" + str(int(profile_number)) + ".data")
+
+    def profile_with_model_number(self, model_number):
+        '''profile number that was saved at a given model number'''
+        return self.index.profile_with_model_number(model_number)
+
+    def profile_data(self, model_number = -1, profile_number = -1):
+        '''parse a profile, by model number or profile number like
+        mr.MesaLogDir.profile_data, defaulting to the last one'''
+        if profile_number == -1:
+            if model_number == -1:
+                profile_number = self.profile_numbers[-1]
+            else:
+                profile_number = self.profile_with_model_number(model_number)
+        fname = self.profile_file(profile_number)
+        return self.prof_cache.get(fname, lambda: mio.read_columns(fname, self.prof_columns, self.dtype))
+
+    def __len__(self):
+        return len(self.model_numbers)
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def data_nbytes(data):
+    '''rough memory footprint of a parsed MESA file'''
+    if getattr(data, 'bulk_data', None) is not None:
+        return data.bulk_data.nbytes
+    return sum(col.nbytes for col in data.columns.values())
+
+def history_file(log_path):
+    '''where MesaRun expects to find the history of a run'''
+    name = os.path.basename(os.path.normpath(log_path))
+    return os.path.join(log_path, "history_" + name + ".data")
+
+def scratch_dir():
+    '''somewhere to pass parsed columns between processes, in memory if the
+    machine has a /dev/shm'''
+    if os.access("/dev/shm", os.W_OK):
+        return tempfile.mkdtemp(prefix = "tuya.", dir = "/dev/shm")
+    return tempfile.mkdtemp(prefix = "tuya.")
+
+def parse_to_scratch(file_name, columns, dtype, scratch, age_range = None, cache = False):
+    '''pool worker, parses a file (or just the rows of a history in
+    age_range) and leaves each column as a .npy file in scratch for the
+    parent to map, rather than pickling the arrays back'''
+    if age_range is None:
+        data = mio.read_columns(file_name, columns, dtype)
+    else:
+        data = mio.load_history(file_name, cache = cache, columns = columns, dtype = dtype, age_range = age_range)
+    out = tempfile.mkdtemp(dir = scratch)
+    for name, col in data.columns.items():
+        np.save(mio.col_path(out, name), col)
+    return file_name, out, list(data.bulk_names), data.header_data, data.span
+
+def warm_history(file_name, columns):
+    '''pool worker, makes sure the history cache holds our columns so the
+    parent can just map them'''
+    mio.load_history(file_name, cache = True, columns = columns)
+
+def map_scratch(result, dtype):
+    '''map the columns a worker left in scratch, then let go of the files,
+    the mappings stay good after the unlink'''
+    file_name, out, bulk_names, header_data, span = result
+    columns = {}
+    for entry in os.listdir(out):
+        name = entry[:-len(".npy")]
+        columns[name] = np.load(os.path.join(out, entry), mmap_mode='r')
+    shutil.rmtree(out, ignore_errors = True)
+    return mio.ColumnData(file_name, bulk_names, header_data, columns = columns, dtype = dtype, span = span)
+
+def load_runs(dirs, jobs = 1, cache = True, prof_cache = None,
+              hist_columns = None, prof_columns = None, dtype = None, age_range = None):
+    '''make a MesaRun for every directory, parsing the histories (or just the
+    rows with star_age in age_range) in a pool of jobs processes when asked
+    to'''
+    histories = [None] * len(dirs)
+    if jobs > 1 and len(dirs) > 1:
+        files = [history_file(d) for d in dirs]
+        with ProcessPoolExecutor(min(jobs, len(dirs))) as pool:
+            if age_range is not None:
+                # the workers read just their stretch of each history
+                scratch = scratch_dir()
+                try:
+                    results = pool.map(parse_to_scratch, files, [hist_columns] * len(files),
+                                       [dtype] * len(files), [scratch] * len(files),
+                                       [age_range] * len(files), [cache] * len(files))
+                    histories = [map_scratch(res, dtype) for res in results]
+                finally:
+                    shutil.rmtree(scratch, ignore_errors = True)
+            elif cache:
+                # the workers fill the cache on disk, and below we map it
+                list(pool.map(warm_history, files, [hist_columns] * len(files)))
+            else:
+                scratch = scratch_dir()
+                try:
+                    results = pool.map(parse_to_scratch, files, [hist_columns] * len(files),
+                                       [dtype] * len(files), [scratch] * len(files))
+                    histories = [map_scratch(res, dtype) for res in results]
+                finally:
+                    shutil.rmtree(scratch, ignore_errors = True)
+
+    return [MesaRun(dirs[i], cache = cache, prof_cache = prof_cache, hist_columns = hist_columns,
+                    prof_columns = prof_columns, dtype = dtype, history = histories[i],
+                    age_range = age_range)
+            for i in range(len(dirs))]
+
+def prefetch_profiles(runs, model_numbers, jobs = 1):
+    '''parse the profiles we're about to plot in a pool of jobs processes and
+    drop them in the shared profile cache, model_numbers holds a list of the
+    wanted model numbers for each run'''
+    todo = []
+    for run, models in zip(runs, model_numbers):
+        for model in models:
+            fname = run.profile_file_with_model_number(model)
+            if fname not in run.prof_cache and (run, fname) not in todo:
+                todo.append((run, fname))
+    if jobs < 2 or len(todo) < 2:
+        return
+
+    scratch = scratch_dir()
+    try:
+        with ProcessPoolExecutor(min(jobs, len(todo))) as pool:
+            results = pool.map(parse_to_scratch, [fname for run, fname in todo],
+                               [run.prof_columns for run, fname in todo],
+                               [run.dtype for run, fname in todo],
+                               [scratch] * len(todo))
+            for (run, fname), res in zip(todo, results):
+                run.prof_cache.put(fname, map_scratch(res, run.dtype))
+    finally:
+        shutil.rmtree(scratch, ignore_errors = True)
+
+def select_profiles(run, number = 0, spacing = "age", skip_first = False):
+    '''model numbers of the number profiles of a run that best equispace it by
+    mass, age, or model, all of them if number is 0'''
+    models = np.asarray(run.model_numbers)
+    rows = run.profile_rows()
+    if skip_first:
+        models = models[1:]
+        rows = rows[1:]
+    if number <= 0 or number >= len(models):
+        return models
+
+    # the quantity we want the profiles evenly spread in
+    if spacing == "mass":
+        metric = np.asarray(run.history.star_mass)[rows]
+    elif spacing == "age":
+        metric = np.asarray(run.history.star_age)[rows]
+    elif spacing == "model":
+        metric = np.arange(len(models), dtype = float)
+    else:
+        raise ValueError("can't space profiles by '" + str(spacing) + "', use mass, age, or model")
+
+    # the profile closest to each of number evenly spaced targets
+    targets = np.linspace(metric.min(), metric.max(), number)
+    picks = np.abs(metric[np.newaxis, :] - targets[:, np.newaxis]).argmin(axis = 1)
+    return models[np.unique(picks)]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# turns a run's profiles into an animation: every frame is worked out up front
+# as plain arrays, then drawn by blitting just the moving lines over a fixed
+# background and streamed straight into an encoder
+
+####################
+# IMPORT LIBRARIES #
+####################
+import numpy as np
+import shutil
+import subprocess
+
+# points each profile is resampled onto when interpolating between profiles
+GRID_POINTS = 512
+
+##################
+# DEFINE CLASSES #
+##################
+class Encoder:
+    '''takes raw RGBA frames one at a time and writes them out as a movie,
+    piped to ffmpeg when we have it, otherwise a GIF through Pillow'''
+
+    def __init__(self, name, width, height, fps = 20, mp4 = False):
+        self.width = width
+        self.height = height
+        self.proc = None
+        self.images = None
+        self.fps = fps
+        ffmpeg = shutil.which("ffmpeg")
+        if mp4:
+            if ffmpeg is None:
+                raise RuntimeError("can't write an mp4 without ffmpeg, leave off --mp4 for a GIF")
+            self.name = name + ".mp4"
+            out = ["-vcodec", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+        else:
+            self.name = name + ".gif"
+            out = ["-vf", "split[a][b];[a]palettegen[p];[b][p]paletteuse"]
+        if ffmpeg is not None:
+            cmd = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba",
+                   "-s", str(width) + "x" + str(height), "-r", str(fps), "-i", "-"] + out + [self.name]
+            self.proc = subprocess.Popen(cmd, stdin = subprocess.PIPE)
+        else:
+            self.images = []
+
+    def write(self, rgba):
+        '''add one frame, a (height, width, 4) uint8 buffer'''
+        if self.proc is not None:
+            self.proc.stdin.write(memoryview(rgba).cast('B'))
+        else:
+            from PIL import Image
+            img = Image.frombuffer("RGBA", (self.width, self.height), bytes(memoryview(rgba).cast('B')), "raw", "RGBA", 0, 1)
+            self.images.append(img.convert("RGB").quantize(method = Image.Quantize.FASTOCTREE))
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.stdin.close()
+            if self.proc.wait() != 0:
+                raise RuntimeError("ffmpeg failed writing " + self.name)
+        elif len(self.images) > 0:
+            self.images[0].save(self.name, save_all = True, append_images = self.images[1:],
+                                duration = int(round(1000 / self.fps)), loop = 0)
+        return self.name
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def resample(x, y, grid, ylog = False):
+    '''y on the grid points, nan wherever the profile doesn't reach'''
+    if len(x) == 0:
+        return np.full(len(grid), np.nan)
+    order = np.argsort(x)
+    x = np.asarray(x, dtype = float)[order]
+    y = np.asarray(y, dtype = float)[order]
+    if ylog:
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            y = np.log10(y)
+    return np.interp(grid, x, y, left = np.nan, right = np.nan)
+
+def profile_frames(profiles, ages, lines, frames = 0, xlog = False, ylog = False):
+    '''work out the (x, y) of every line on every frame from a run's profiles,
+    lines(profile) gives the lines drawn from one profile, and with frames > 0
+    that many frames are made evenly spaced in age, blending neighbouring
+    profiles, otherwise each profile is a frame; returns the frames and the
+    age of each'''
+    raw = [[(np.asarray(x), np.asarray(y)) for x, y in lines(prof)] for prof in profiles]
+    if frames <= 0 or len(profiles) < 2:
+        return raw, np.asarray(ages, dtype = float)
+
+    # one grid for the whole run, covering every profile, leaving out lines
+    # with nothing to put on it (nothing above zero on a log axis)
+    reach = [x[x > 0] if xlog else x for prof in raw for x, y in prof]
+    reach = [x for x in reach if len(x) > 0]
+    if len(reach) == 0:
+        return raw, np.asarray(ages, dtype = float)
+    lo = min(x.min() for x in reach)
+    hi = max(x.max() for x in reach)
+    grid = np.geomspace(lo, hi, GRID_POINTS) if xlog else np.linspace(lo, hi, GRID_POINTS)
+    stack = np.array([[resample(x, y, grid, ylog) for x, y in prof] for prof in raw])
+
+    # where each frame falls between two profiles
+    ages = np.asarray(ages, dtype = float)
+    times = np.linspace(ages[0], ages[-1], frames)
+    idx = np.clip(np.searchsorted(ages, times, side = 'right') - 1, 0, len(ages) - 2)
+    span = ages[idx + 1] - ages[idx]
+    w = np.where(span > 0, (times - ages[idx]) / np.where(span > 0, span, 1), 0.0)
+    w = np.clip(w, 0, 1)[:, np.newaxis, np.newaxis]
+
+    # blend, falling back on whichever profile reaches a point if only one does
+    a = stack[idx]
+    b = stack[idx + 1]
+    blend = (1 - w) * a + w * b
+    blend = np.where(np.isnan(a), b, np.where(np.isnan(b), a, blend))
+    if ylog:
+        blend = 10**blend
+    return [[(grid, blend[k, n]) for n in range(blend.shape[1])] for k in range(frames)], times
+
+def data_limits(frames, log = False, axis = 0):
+    '''smallest and largest value on one axis over every line of every frame'''
+    lo = np.inf
+    hi = -np.inf
+    for frame in frames:
+        for line in frame:
+            v = np.asarray(line[axis])
+            v = v[np.isfinite(v)]
+            if log:
+                v = v[v > 0]
+            if len(v) > 0:
+                lo = min(lo, v.min())
+                hi = max(hi, v.max())
+    if not np.isfinite(lo):
+        return None
+    return lo, hi
+
+def render_frames(fig, ax, artists, texts, frames, labels, encoder):
+    '''draw the still parts of the figure once, then for every frame restore
+    that background, draw only the moving artists on top and hand the pixels
+    to the encoder; frames[k][n] is the (x, y) of artists[n] on frame k'''
+    for artist in artists + texts:
+        artist.set_animated(True)
+    canvas = fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    for k in range(len(frames)):
+        canvas.restore_region(background)
+        for artist, (x, y) in zip(artists, frames[k]):
+            artist.set_data(x, y)
+            ax.draw_artist(artist)
+        for text, label in zip(texts, labels[k]):
+            text.set_text(label)
+            ax.draw_artist(text)
+        encoder.write(np.asarray(canvas.buffer_rgba()))
+    return encoder.close()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# one table of where every active run is up to: the scheduler is asked once
+# (and the answer shared between anyone asking within a few seconds), and
+# only the last row of each history is read, all of them at once
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_io as mio
+import argparse
+import getpass
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# the dispatcher side (backends.py) lives in bin/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "bin"))
+import backends
+
+# what the table shows by default, by history column name
+COLUMNS = ["model_number", "star_age", "star_mass", "dt", "elapsed_time"]
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def cached_status(backend, max_age = 10.0):
+    '''the jobs the backend knows about, from a cache file if someone asked
+    less than max_age seconds ago, so a room full of people running this
+    only costs the scheduler one query'''
+    cache = os.path.join(os.path.dirname(backends.REGISTRY),
+                         "status." + backend.name + "." + getpass.getuser() + ".json")
+    try:
+        if time.time() - os.stat(cache).st_mtime < max_age:
+            with open(cache) as f:
+                return [backends.Job(**job) for job in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        pass
+
+    jobs = backend.status()
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok = True)
+        fd, tmp = tempfile.mkstemp(dir = os.path.dirname(cache))
+        with os.fdopen(fd, "w") as f:
+            json.dump([job.__dict__ for job in jobs], f)
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return jobs
+
+def sweep_runs(job):
+    '''the runs behind a packed or job array sweep job, from the lines of
+    its manifest with its index (all of them if we don't know it)'''
+    manifest = job.name + ".manifest"
+    if not os.path.exists(manifest):
+        return []
+    runs = []
+    with open(manifest) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            words = line.rstrip("\n").split("\t")
+            if job.index is not None and words[0] != str(job.index):
+                continue
+            runs.append((words[2], words[1]))
+    return runs
+
+def active_runs(jobs, states):
+    '''(name, state, work dir) of every run in the jobs we care about'''
+    runs = []
+    for job in jobs:
+        if job.state not in states:
+            continue
+        if job.name.startswith("sweep-"):
+            runs += [(name, job.state, work) for name, work in sweep_runs(job)]
+        else:
+            runs.append((job.name, job.state, job.work or job.name))
+    return runs
+
+def last_row(name, work, columns):
+    '''the last row of a run's history, by column name'''
+    tail = mio.HistoryTail(os.path.join(work, "LOGS", name, "history_" + name + ".data"),
+                           columns, from_end = True)
+    tail.poll()
+    return tail.last
+
+def value(row, key):
+    '''a column out of a row, undoing the log if that's all we have'''
+    if key in row:
+        return row[key]
+    for prefix in mio.LOG_PREFIXES:
+        if prefix + key in row:
+            return 10**row[prefix + key]
+    return None
+
+def cell(x):
+    '''a value as it goes in the table'''
+    if x is None:
+        return "-"
+    if float(x).is_integer() and abs(x) < 1e9:
+        return str(int(x))
+    return "{:.4g}".format(float(x))
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.MetavarTypeHelpFormatter)
+    parser.add_argument("dirs", nargs='*', help="work dirs to report on, instead of asking the scheduler", type=str)
+    parser.add_argument("-c", "--columns", nargs='+', help="history columns to show, by name", type=str, default=COLUMNS)
+    parser.add_argument("-b", "--backend", help="pbs or local", type=str, default="pbs")
+    parser.add_argument("-a", "--all", help="include queued and finished jobs, not just running ones", action='store_true')
+    parser.add_argument("--max-age", help="reuse a scheduler query up to this many seconds old", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.dirs:
+        runs = [(os.path.basename(os.path.normpath(d)), "", d) for d in args.dirs]
+    else:
+        jobs = cached_status(backends.get_backend(args.backend), args.max_age)
+        runs = active_runs(jobs, backends.STATES if args.all else ["R"])
+
+    # read the ends of all the histories at once
+    with ThreadPoolExecutor(32) as pool:
+        rows = list(pool.map(lambda run: last_row(run[0], run[2], args.columns), runs))
+
+    table = [["run", "state"] + args.columns]
+    for (name, state, work), row in zip(runs, rows):
+        table.append([name, state] + [cell(value(row, key)) for key in args.columns])
+    widths = [max(len(line[k]) for line in table) for k in range(len(table[0]))]
+    for line in table:
+        print("  ".join(word.ljust(width) for word, width in zip(line, widths)))
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# one row of numbers per run for a whole sweep (when it hit the ZAMS, where
+# its mass ended up, how close it got to Eddington, ...), each history
+# reduced with numpy in a pool of processes, and only the runs whose history
+# changed since the last time looked at again
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_io as mio
+import events as ev
+import catalog
+import numpy as np
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# the dispatcher side (namelist.py) lives in bin/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "bin"))
+import namelist
+
+SUMMARY = "mesa_summary.csv"
+
+# the history columns the summaries are made from
+COLUMNS = ["model_number", "star_age", "star_mass", "log_L", "log_Lnuc", "luminosity",
+           "DM_energy_rate", "elapsed_time", "N_chi", "L_div_Ledd", "max_L_div_Ledd"]
+
+# what's in the table, and the summaries it has on each run
+FIELDS = ["path", "name", "initial_mass", "m_chi", "rho_chi", "models",
+          "zams_age", "final_mass", "max_eddington", "peak_DM_energy_rate",
+          "elapsed_time", "final_N_chi", "stamp"]
+SUMMARIES = FIELDS[6:-1]
+
+# Eddington luminosity per solar mass for electron scattering in pure
+# hydrogen (kappa = 0.4), for histories that don't have L_div_Ledd
+LEDD_PER_MSUN = 3.2e4
+
+# a run name out of a sweep, e.g. '4.13...1d2' is M_chi = 1d4, rho_chi = 1d13
+# and a 1d2 Msun star
+RUN_NAME = re.compile(r"^(\d+)\.(\d+)\.\.\.(.+)$")
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def column(history, key):
+    '''a history column as floats, None if the file doesn't have it'''
+    try:
+        return np.asarray(history.data(key), dtype = float)
+    except KeyError:
+        return None
+
+def eddington(history):
+    '''the Eddington factor over the run, MESA's own if the history has it,
+    otherwise L over the electron scattering Eddington luminosity'''
+    for key in ["max_L_div_Ledd", "L_div_Ledd"]:
+        gamma = column(history, key)
+        if gamma is not None:
+            return gamma
+    L = column(history, "luminosity")
+    if L is None:
+        return None
+    return L/(LEDD_PER_MSUN*column(history, "star_mass"))
+
+def wall_time(elapsed):
+    '''total elapsed_time over a run, which starts again from zero at every
+    restart, so add up the end of each stretch'''
+    if elapsed is None or len(elapsed) == 0:
+        return None
+    ends = np.flatnonzero(np.diff(elapsed) < 0)
+    return float(elapsed[ends].sum() + elapsed[-1])
+
+def peak(x):
+    return None if x is None or len(x) == 0 else float(np.nanmax(x))
+
+def final(x):
+    return None if x is None or len(x) == 0 else float(x[-1])
+
+def summarize(history):
+    '''the summaries of one parsed history, by field name'''
+    row = dict.fromkeys(SUMMARIES)
+    row["models"] = len(history)
+    if len(history) == 0:
+        return row
+    if all(history.in_data(key) for key in ["star_age", "log_L", "log_Lnuc"]):
+        zams = ev.zams(history)
+        if zams:
+            row["zams_age"] = float(history.star_age[zams[0][0]])
+    row["final_mass"] = final(column(history, "star_mass"))
+    row["max_eddington"] = peak(eddington(history))
+    row["peak_DM_energy_rate"] = peak(column(history, "DM_energy_rate"))
+    row["elapsed_time"] = wall_time(column(history, "elapsed_time"))
+    row["final_N_chi"] = final(column(history, "N_chi"))
+    return row
+
+def run_params(log_dir):
+    '''star mass, M_chi and rho_chi of a run, from its inlist, or from its
+    name if it doesn't have one'''
+    params = {}
+    inlist = catalog.inlist_file(log_dir)
+    if inlist is not None:
+        params = namelist.read_inlist(inlist)
+    found = {"initial_mass": namelist.number(params.get("initial_mass")),
+             "m_chi": namelist.number(params.get("x_ctrl(1)")),
+             "rho_chi": namelist.number(params.get("x_ctrl(2)"))}
+    match = RUN_NAME.match(os.path.basename(os.path.normpath(log_dir)))
+    if match:
+        guess = {"initial_mass": namelist.number(match.group(3)),
+                 "m_chi": 10.0**int(match.group(1)), "rho_chi": 10.0**int(match.group(2))}
+        found = {key: guess[key] if value is None else value for key, value in found.items()}
+    return found
+
+def summarize_run(root, path):
+    '''pool worker, the table row for the run in root/path'''
+    log_dir = os.path.join(root, path)
+    name = os.path.basename(os.path.normpath(path))
+    history = os.path.join(log_dir, "history_" + name + ".data")
+    row = {"path": path, "name": name, "stamp": catalog.stamp(log_dir)}
+    row.update(run_params(log_dir))
+    row.update(summarize(mio.read_columns(history, COLUMNS)))
+    return row
+
+def read_summary(file_name):
+    '''rows of a summary table by path, numbers as floats, empty if there
+    isn't one yet'''
+    rows = {}
+    try:
+        with open(file_name, newline = "") as f:
+            for row in csv.DictReader(f):
+                for key in row:
+                    if key in ["path", "name", "stamp"]:
+                        continue
+                    row[key] = None if row[key] in ["", None] else float(row[key])
+                if row.get("models") is not None:
+                    row["models"] = int(row["models"])
+                rows[row["path"]] = row
+    except OSError:
+        pass
+    return rows
+
+def write_summary(file_name, rows):
+    '''write the table in one go, so nobody reads half of it'''
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator = "\n")
+    writer.writerow(FIELDS)
+    for row in rows:
+        writer.writerow(["" if row.get(key) is None else repr(row[key]) if isinstance(row[key], float)
+                         else row[key] for key in FIELDS])
+    namelist.write_atomic(file_name, out.getvalue())
+
+def update(root = ".", file_name = None, jobs = 1, force = False):
+    '''bring the summary table of the runs under root up to date, only
+    rereading histories that changed, returns the rows and how many were
+    (re)made'''
+    file_name = file_name or os.path.join(root, SUMMARY)
+    old = {} if force else read_summary(file_name)
+    paths = catalog.find_runs(root)
+    todo = [path for path in paths
+            if path not in old or old[path]["stamp"] != catalog.stamp(os.path.join(root, path))]
+
+    new = {}
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(min(jobs, len(todo))) as pool:
+            for row in pool.map(summarize_run, [root] * len(todo), todo, chunksize = 4):
+                new[row["path"]] = row
+    else:
+        for path in todo:
+            new[path] = summarize_run(root, path)
+
+    rows = [new.get(path) or old[path] for path in paths]
+    if len(new) > 0 or len(rows) != len(old):
+        write_summary(file_name, rows)
+    return rows, len(new)
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.MetavarTypeHelpFormatter)
+    parser.add_argument("-r", "--root", help="directory the runs are under", type=str, default=".")
+    parser.add_argument("-o", "--output", help="table to write, " + SUMMARY + " in the root by default", type=str)
+    parser.add_argument("-j", "--jobs", help="number of processes to read histories with", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-F", "--force", help="redo every run, not just the ones that changed", action='store_true')
+    args = parser.parse_args()
+
+    rows, changed = update(args.root, args.output, args.jobs, args.force)
+    print("summarized " + str(changed) + " of " + str(len(rows)) + " runs into "
+          + (args.output or os.path.join(args.root, SUMMARY)))
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
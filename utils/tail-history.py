@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# prints the latest values of history columns, picked by name, for one or
+# more runs, and can keep following them while the jobs are running
+
+####################
+# IMPORT LIBRARIES #
+####################
+import mesa_io as mio
+import argparse
+import time
+
+####################
+# DEFINE FUNCTIONS #
+####################
+def print_last(tail):
+    '''print the newest row we've seen from a history file'''
+    print(tail.file_name)
+    if len(tail.last) == 0:
+        print("    no data yet")
+    for name in tail.names:
+        if name in tail.last:
+            print("    " + name + " " + str(tail.last[name]))
+
+########
+# MAIN #
+########
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.MetavarTypeHelpFormatter)
+    parser.add_argument("files", nargs='+', help="history files to read", type=str)
+    parser.add_argument("-c", "--columns", nargs='+', help="history columns to print, by name", type=str,
+                        default=["model_number", "star_age", "star_mass"])
+    parser.add_argument("-w", "--watch", help="keep polling every this many seconds, printing runs with new rows", type=float)
+    args = parser.parse_args()
+
+    # a one off only needs the last row, so don't bother parsing the rest
+    tails = [mio.HistoryTail(f, args.columns, from_end = True) for f in args.files]
+    for tail in tails:
+        tail.poll()
+        print_last(tail)
+
+    # each poll only reads what was appended since the last one
+    while args.watch:
+        time.sleep(args.watch)
+        for tail in tails:
+            if tail.poll() > 0:
+                print_last(tail)
+
+###########
+# EXECUTE #
+###########
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -8,10 +8,14 @@
 # IMPORT LIBRARIES #
 ####################
 import mesa_reader as mr
+import mesa_io as mio
+import events as ev
+import movie
+import decimate
+from mesa_run import ProfileCache, load_runs, prefetch_profiles, select_profiles, history_file
 import sys
 import argparse
 import numpy as np
-import mpmath as mp
 import math
 from decimal import Decimal as D
 import scipy.special as sc
@@ -22,6 +26,11 @@ from scipy.interpolate import UnivariateSpline
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 import matplotlib
+import matplotlib.collections
+import matplotlib.lines
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.animation as an
 from mpl_toolkits.axes_grid1 import host_subplot
 import mpl_toolkits.axisartist as AA
@@ -31,6 +40,8 @@ import csv
 import copy
 import os.path
 from os import path
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 ##################
 # DEFINE CLASSES #
@@ -79,9 +90,77 @@ class PopIIIStar:
         Vesc = np.sqrt(2*G*M/R) # escape velocity(cm/s) 
         return Vesc
 
+# colormaps every plot draws from
+palette = plt.get_cmap('magma')
+vir = plt.get_cmap('viridis')
+
+# what the render workers draw from, filled in by main before forking
+render_state = None
+
+###########
+# COLUMNS #
+###########
+# resolution plots are saved at
+DPI = 400
+
+# history columns each plot reads, so we only ever parse those
+HIST_COLS = {
+    'HR': ['log_Teff', 'log_L', 'log_Lnuc', 'radius'],
+    'dRdt': ['radius'],
+    'dLdt': ['luminosity', 'log_Lnuc', 'DM_energy_rate'],
+    'derrdt': ['rel_E_err'],
+    'drunerrdt': ['rel_run_E_err'],
+    'dMdt': ['radius'],
+    'DMevo': ['DM_energy_rate', 'C_tot', 'N_chi'],
+    'cpu': ['elapsed_time'],
+}
+
+# every run needs these for labels, spacing and colors
+BASE_HIST_COLS = ['model_number', 'star_age', 'star_mass']
+
+# profile columns each plot reads
+PROF_COLS = {
+    'rho': ['radius', 'logRho'],
+    'dm': ['radius', 'dm'],
+    'cell': ['radius'],
+    'P': ['radius', 'pressure'],
+    'T': ['radius', 'temperature'],
+    'L': ['radius', 'luminosity', 'extra_L'],
+    'Edd': ['radius', 'log_L_div_Ledd'],
+    'Edd2': ['radius', 'log_Lrad_div_Ledd'],
+    'beta': ['radius', 'pgas', 'pressure'],
+    'XYZ': ['radius', 'x_mass_fraction_H', 'y_mass_fraction_He', 'z_mass_fraction_metals'],
+    'DMheat': ['radius', 'extra_heat'],
+    'DMprof': ['radius', 'n_chi2'],
+    'DMprofAC': ['radius', 'rho_chi'],
+    'Arho': ['radius', 'logRho'],
+    'AP': ['radius', 'pressure'],
+    'AT': ['radius', 'temperature'],
+    'AL': ['radius', 'luminosity', 'extra_L'],
+    'AEdd': ['radius', 'log_L_div_Ledd'],
+    'Abeta': ['radius', 'pgas', 'pressure'],
+    'AXYZ': ['radius', 'x_mass_fraction_H', 'y_mass_fraction_He', 'z_mass_fraction_metals'],
+}
+
 ####################
 # DEFINE FUNCTIONS #
 ####################
+def needed_columns(args):
+    '''work out which history and profile columns the requested plots need'''
+    hist_cols = list(BASE_HIST_COLS)
+    prof_cols = []
+    for flag, cols in HIST_COLS.items():
+        if getattr(args, flag):
+            hist_cols += [c for c in cols if c not in hist_cols]
+    for flag, cols in PROF_COLS.items():
+        if getattr(args, flag):
+            prof_cols += [c for c in cols if c not in prof_cols]
+    return hist_cols, prof_cols
+
+def selected_models(args, runs):
+    '''model numbers of the profiles each run will actually plot'''
+    return [select_profiles(run, args.number, args.spacing, args.skip_first) for run in runs]
+
 def read_in_T_chi(name):
     '''reads T_chi vs M_chi data from CSV files'''
     # read DM temp from csv
@@ -128,13 +207,6 @@ def assign_const():
     global eps_per_Lsun
     eps_per_Lsun = 2.599*10*-34
 
-def mesa_dir(direc):
-    arg1 = direc
-    hist= "history_" + arg1 + ".data"
-    print(hist)
-    direc = mr.MesaLogDir(log_path=arg1, history_file=hist)
-    return direc
-
 def mesa_prof(direc, profile):
     '''gets profile numbers for a MESA run'''
     # use mesa_reader to get our profile data
@@ -166,20 +238,6 @@ def gen_hist_labels(dirs, history):
     # return our list of labels
     return labels
 
-def gen_profs(dirs):
-    '''get the indices of profiles during various interesting points in the stars evolution '''
-    # 2d array
-    profs = []
-
-    # run thru each star we want to plot
-    for i in range(len(dirs)):
-        index = mr.MesaProfileIndex(file_name=dirs[i] + '/profiles.index')
-        prof_nums = index.model_numbers
-
-        # data for this profile
-        profs.append(prof_nums)
-    return profs
-
 def progbarinit(barlen = 20):
     '''prints a simple progress bar'''
     # sys.stdout.write("[%s]" % (" " * barlen))
@@ -196,90 +254,1059 @@ def progbarend():
     '''this ends the progress bar'''
     # sys.stdout.write("]\n")
 
-def save_plt(plt, name, args):
+def save_fig(fig, ax, name, args):
     '''makes modifications to plot with any of the force options, and saves it'''
-    # tight margins
-    plt.tight_layout()
+    finish_axes(fig, ax, args)
+
+    # only draw the history rows that show, then put the rest back for
+    # anyone still using the lines
+    saved = []
+    if not args.every_row and pin_legend(fig, ax):
+        saved = thin_lines(fig, ax, DPI)
+    write_fig(fig, name, args)
+    for line, xs, ys in saved:
+        line.set_data(xs, ys)
+
+def from_history(lines, hist, x, y):
+    '''mark lines as drawn from history columns x and y (or anything that
+    goes up and down with them), so save_fig can thin them out'''
+    for line in lines:
+        line.history_columns = (hist, x, y)
+    return lines
+
+def pin_legend(fig, ax):
+    '''fix a loc='best' legend to the corner every row of the lines puts it
+    in, before they're thinned and it could go somewhere else, returns False
+    if we couldn't, and then the lines had better be drawn in full'''
+    legend = ax.get_legend()
+    if legend is None:
+        return True
+    # this leans on matplotlib's insides (and set_loc is 3.8 on), which may
+    # not be there in the one we've got
+    try:
+        if legend._loc != 0:
+            return True
+        renderer = fig._get_renderer()
+        size = legend._legend_box.get_bbox(renderer)
+        best = legend._find_best_position(size.width, size.height, renderer)
+        box = Bbox.from_bounds(0, 0, size.width, size.height)
+        for code in range(1, len(legend.codes)):
+            if np.allclose(legend._get_anchored_bbox(code, box, legend.get_bbox_to_anchor(), renderer), best):
+                legend.set_loc(code)
+                return True
+    except (AttributeError, TypeError):
+        pass
+    return False
+
+def thin_lines(fig, ax, dpi):
+    '''swap every long history line for just the rows that show up at dpi,
+    picked with the pyramids of its columns, returns what to put back'''
+    # make sure the limits are settled, we're measuring in them
+    ax.get_xlim()
+    ax.get_ylim()
+    scale = dpi/fig.dpi
+    box = ax.bbox.extents*scale
+    saved = []
+    for line in ax.lines:
+        source = getattr(line, 'history_columns', None)
+        if source is None:
+            continue
+        hist, x, y = source
+        xs = np.asarray(line.get_xdata(), dtype = float)
+        ys = np.asarray(line.get_ydata(), dtype = float)
+        n = len(xs)
+        # lines that don't follow their history row for row can't be thinned
+        if n != len(hist) or not decimate.worth_it(n, ax.bbox.width*scale):
+            continue
+
+        def to_pixels(rows):
+            p = line.get_transform().transform(np.column_stack([xs[rows], ys[rows]]))*scale
+            p[~np.isfinite(p)] = np.nan
+            return p[:, 0], p[:, 1]
+
+        rows = decimate.select_rows(hist.pyramid(x), hist.pyramid(y), n, to_pixels, box)
+        saved.append((line, xs, ys))
+        line.set_data(xs[rows], ys[rows])
+    return saved
+
+def vertex_count(artist):
+    '''rough number of vertices an artist writes into a vector file'''
+    if isinstance(artist, matplotlib.lines.Line2D):
+        return len(artist.get_xdata())
+    if isinstance(artist, matplotlib.collections.Collection):
+        paths = artist.get_paths()
+        if len(paths) == 0:
+            return 0
+        # scatter plots stamp one marker at every offset
+        stamped = len(artist.get_offsets())*len(paths[0].vertices)
+        return max(sum(len(path.vertices) for path in paths), stamped)
+    return 0
+
+def rasterize_dense(fig, budget):
+    '''rasterize the data with the most vertices, a line or collection at a
+    time, until what's left as vectors fits in budget, axes, labels and text
+    always stay vectors'''
+    counts = []
+    for ax in fig.axes:
+        counts += [(vertex_count(artist), artist) for artist in list(ax.lines) + list(ax.collections)]
+    total = sum(count for count, artist in counts)
+    for count, artist in sorted(counts, key = lambda c: -c[0]):
+        if total <= budget:
+            break
+        artist.set_rasterized(True)
+        total -= count
+
+def write_fig(fig, name, args):
+    '''saves a finished plot as a PNG, or a PDF if asked for'''
+    # check file type params
+    if args.PDF:
+        # dense data goes in as a picture, so the file stays a sane size
+        rasterize_dense(fig, args.vertex_budget)
+        # tight_layout leaves a placeholder layout engine behind, and savefig
+        # then does a dry run draw first, which still draws the rasterized
+        # parts
+        if hasattr(fig, "set_layout_engine"):
+            fig.set_layout_engine(None)
+        fig.savefig(name + ".pdf", dpi = DPI)
+    else:
+        fig.savefig(name + ".png", dpi = DPI)
 
+def finish_axes(fig, ax, args):
+    '''applies the force options, legend and margins to a plot'''
     # check axes params
     if args.xlog:
-        plt.xscale('log')
+        ax.set_xscale('log')
     if args.ylog:
-        plt.yscale('log')
+        ax.set_yscale('log')
     if args.xlin:
-        plt.xscale('linear')
+        ax.set_xscale('linear')
     if args.ylin:
-        plt.yscale('linear')
+        ax.set_yscale('linear')
 
     # have we forced any axes?
-    if 'args.xaxis' in globals():
-        btm = args.xaxis[0]
-        top = args.xaxis[1]
-        plt.xlin(xbtm, xtop)
-
-    if 'args.yaxis' in globals():
-        btm = args.yaxis[0]
-        top = args.yaxis[1]
-        plt.xlin(btm, top)
+    if args.xaxis:
+        ax.set_xlim(args.xaxis[0], args.xaxis[1])
+    if args.yaxis:
+        ax.set_ylim(args.yaxis[0], args.yaxis[1])
 
     if args.no_legend:
        pass 
     else:
-        plt.legend()
+        ax.legend()
 
-    # check file type params
-    if args.PDF:
-        plt.savefig(name+ ".pdf")
-    else:
-        plt.savefig(name + ".png", dpi = 400)
+    # tight margins
+    fig.tight_layout()
+
+def annotate(ax, args, runs, kind, x, y):
+    '''mark one kind of event ('ZAMS', 'mass' or 'radius') for every run, at
+    its position on the x and y history columns of the plot'''
+    if args.no_annotate:
+        return
+    marks = []
+    for run in runs:
+        xs = run.history.data(x)
+        ys = run.history.data(y)
+        for row, color in run.events(kind):
+            if kind == 'ZAMS':
+                marks.append(ax.scatter(xs[row], ys[row], c="#E0115F", s=10))
+            else:
+                marks.append(ax.scatter(xs[row], ys[row], color=palette(color/12), s=20))
+            marks.append(ax.annotate(ev.event_label(run.history, kind, row), (xs[row], ys[row])))
+    # remember what we marked, so --watch can mark it again as runs go on
+    ax.event_marks = getattr(ax, 'event_marks', []) + [(kind, x, y, marks)]
+
+def reannotate(ax, args, runs):
+    '''take the event marks off a plot and put them back from the runs'
+    histories as they are now'''
+    marks = getattr(ax, 'event_marks', [])
+    ax.event_marks = []
+    for kind, x, y, artists in marks:
+        for artist in artists:
+            artist.remove()
+        annotate(ax, args, runs, kind, x, y)
+
+# which events each plot annotates
+PLOT_EVENTS = {'HR': ['ZAMS', 'mass'], 'dRdt': ['mass'], 'dLdt': ['mass'], 'derrdt': ['mass'],
+               'drunerrdt': ['mass'], 'dMdt': ['radius'], 'DMevo': ['mass']}
+
+def new_figure(args):
+    '''a figure of our own for each plot, only handed to pyplot if we are
+    going to show it in a window'''
+    if args.show:
+        return plt.figure()
+    return Figure()
+
+def render(flag, args, runs, history, profs, hist_lab, filename):
+    '''draw one plot on its own figure and save it'''
+    fig = new_figure(args)
+    ax = fig.add_subplot()
+    name = PLOTS[flag](ax, args, runs, history, profs, hist_lab, filename)
+    save_fig(fig, ax, name, args)
     if args.show:
         plt.show()
-    plt.clf()
+    return name
+
+def render_worker(flag):
+    '''pool worker, draws one plot out of the runs the parent loaded before
+    forking us, and reports how the profile cache did'''
+    cache = render_state[1][0].prof_cache
+    hits = cache.hits
+    misses = cache.misses
+    render(flag, *render_state)
+    return cache.hits - hits, cache.misses - misses
+
+# the lines each history plot draws for every run, in the order it draws
+# them, so --watch can extend them with new rows
+LIVE_LINES = {
+    'HR': lambda h: [(h.log_Teff, h.log_L)],
+    'dRdt': lambda h: [(h.star_age, h.radius)],
+    'dLdt': lambda h: [(h.star_age, h.luminosity), (h.star_age, 10**h.log_Lnuc),
+                       (h.star_age, h.DM_energy_rate/eps_per_Lsun)],
+    'derrdt': lambda h: [(h.star_age, h.rel_E_err)],
+    'drunerrdt': lambda h: [(h.star_age, h.rel_run_E_err)],
+    'dMdt': lambda h: [(h.star_age, h.star_mass)],
+    'DMevo': lambda h: [(h.star_age, h.DM_energy_rate), (h.star_age, h.C_tot), (h.star_age, h.N_chi)],
+    'cpu': lambda h: [(h.star_age, h.elapsed_time)],
+}
+
+def grow_history(history, keep, new):
+    '''a history cut back to its first keep rows, with the rows of new after
+    them'''
+    columns = {key: mio.cast(np.concatenate([history.column(key)[:keep], col]), history.dtype)
+               for key, col in new.columns.items()}
+    return mio.ColumnData(history.file_name, history.bulk_names, history.header_data,
+                          columns = columns, dtype = history.dtype)
+
+def watch(flags, args, runs, history, profs, hist_lab, filename, tails):
+    '''keep the history plots open and, every args.watch seconds, extend their
+    lines with whatever rows the running jobs have appended, along with the
+    runs' histories and events, saving a plot again only when one of its runs
+    moved'''
+    plots = []
+    for flag in flags:
+        fig = new_figure(args)
+        ax = fig.add_subplot()
+        name = PLOTS[flag](ax, args, runs, history, profs, hist_lab, filename)
+        save_fig(fig, ax, name, args)
+        plots.append((flag, fig, ax, name))
+
+    print("watching " + str(len(runs)) + " runs, ctrl-c to stop...")
+    try:
+        while True:
+            time.sleep(args.watch)
+            fresh = {}
+            for j in range(len(runs)):
+                if tails[j].poll() == 0:
+                    continue
+                cols = tails[j].drain()
+                new = mio.ColumnData(tails[j].file_name, tails[j].bulk_names, tails[j].header_data, columns = cols)
+                if len(new) == 0:
+                    continue
+
+                # a restart rewrites rows from an earlier model, cut back to it
+                keep = np.searchsorted(np.asarray(history[j].model_number), new.model_number[0])
+                history[j] = runs[j].history = grow_history(history[j], keep, new)
+                runs[j].event_tables = {}
+                runs[j].rows = None
+                fresh[j] = (keep, new)
+            if len(fresh) == 0:
+                continue
+
+            for flag, fig, ax, name in plots:
+                per_run = len(LIVE_LINES[flag](history[0]))
+                for j, (keep, new) in fresh.items():
+                    for k, (x, y) in enumerate(LIVE_LINES[flag](new)):
+                        line = ax.lines[j*per_run + k]
+                        line.set_data(np.concatenate([line.get_xdata()[:keep], x]),
+                                      np.concatenate([line.get_ydata()[:keep], y]))
+                        # so it can still be thinned
+                        if getattr(line, 'history_columns', None) is not None:
+                            line.history_columns = (history[j],) + line.history_columns[1:]
+                reannotate(ax, args, runs)
+                ax.relim()
+                ax.autoscale_view()
+                save_fig(fig, ax, name, args)
+            print("updated " + ", ".join(runs[j].name + " (model " + str(int(history[j].model_number[-1])) + ")" for j in fresh))
+    except KeyboardInterrupt:
+        pass
+
+# what each animation draws from a profile, as (x, y) pairs, with the style
+# and legend entry of each line, following the matching static plot
+ANIMS = {
+    'Arho': {'title': "Density Profile", 'ylabel': 'Density [g cm$^{-3}$]', 'yscale': 'log',
+             'styles': [('-', None)], 'suffix': "_rho",
+             'lines': lambda d: [(d.radius, 10**(d.logRho))]},
+    'AP': {'title': "Pressure Profile", 'ylabel': 'Pressure [g cm$^{-1}$ s$^{-2}$]', 'yscale': 'log',
+           'styles': [('-', None)], 'suffix': "_P",
+           'lines': lambda d: [(d.radius, d.pressure)]},
+    'AT': {'title': "Temperature Profile", 'ylabel': 'Temperature [K]', 'yscale': 'log',
+           'styles': [('-', None)], 'suffix': "_T",
+           'lines': lambda d: [(d.radius, d.temperature)]},
+    'AL': {'title': "Luminosity Profile", 'ylabel': 'Luminosity [$L_{\odot}$]', 'yscale': 'log', 'xscale': 'log',
+           'styles': [('-', None), ('--', "extra"), (':', "other")], 'suffix': "_L",
+           'lines': lambda d: [(d.radius, d.luminosity), (d.radius, d.extra_L),
+                               (d.radius, d.luminosity - d.extra_L)]},
+    'AEdd': {'title': "Eddintgon Factor Profile", 'ylabel': 'Eddington Factor $(\\frac{L(r)}{L_{edd}(r)})$', 'yscale': 'log',
+             'styles': [('-', None)], 'suffix': "_Edd",
+             'lines': lambda d: [(d.radius, 10**(d.log_L_div_Ledd))]},
+    'Abeta': {'title': "Beta Profile", 'ylabel': '$\\beta ~ (\\frac{P_{gas}(r)}{P(r)})$', 'yscale': 'linear',
+              'styles': [('-', None)], 'suffix': "_beta",
+              'lines': lambda d: [(d.radius, d.pgas/d.pressure)]},
+    'AXYZ': {'title': "Composition Profile", 'ylabel': 'Composition Fraction', 'yscale': 'log',
+             'styles': [('-', "H"), ('--', "He"), (':', "Z")], 'suffix': "_XYZ",
+             'lines': lambda d: [(d.radius, d.x_mass_fraction_H), (d.radius, d.y_mass_fraction_He),
+                                 (d.radius, d.z_mass_fraction_metals)]},
+}
+
+def make_animation(flag, args, runs, profs, filename):
+    '''animate one of the --A* flags through the selected profiles of every
+    run at once, see movie.py'''
+    spec = ANIMS[flag]
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xscale(spec.get('xscale', 'linear'))
+    ax.set_yscale(spec.get('yscale', 'linear'))
+    xlog = (ax.get_xscale() == 'log' or args.xlog) and not args.xlin
+    ylog = (ax.get_yscale() == 'log' or args.ylog) and not args.ylin
+
+    # every frame of every run, as arrays, before drawing anything
+    per_run = []
+    for j in range(len(runs)):
+        if len(profs[j]) == 0:
+            continue
+        data = [runs[j].profile_data(int(model)) for model in profs[j]]
+        ages = [dat.star_age for dat in data]
+        masses = [dat.star_mass for dat in data]
+        frames, times = movie.profile_frames(data, ages, spec['lines'], args.frames, xlog, ylog)
+        # plain text, mathtext would be parsed again for every frame
+        labels = [runs[j].name + ": " + str(round(t, 3)) + " yr, "
+                  + str(round(np.interp(t, ages, masses), 3)) + " Msun" for t in times]
+        per_run.append((j, frames, labels))
+    if len(per_run) == 0:
+        print("no profiles to animate for --" + flag + "...")
+        return None
+
+    # shorter runs hold their last frame
+    count = max(len(frames) for j, frames, labels in per_run)
+    frames = [sum((f[min(k, len(f) - 1)] for j, f, l in per_run), []) for k in range(count)]
+    labels = [[l[min(k, len(l) - 1)] for j, f, l in per_run] for k in range(count)]
+
+    # the moving parts
+    artists = []
+    texts = []
+    for n, (j, f, l) in enumerate(per_run):
+        for ls, lab in spec['styles']:
+            line, = ax.plot([], [], color=vir(j / len(runs)), ls = ls, linewidth=2,
+                            label=runs[j].name if lab is None else lab)
+            artists.append(line)
+        texts.append(ax.text(0.02, 0.96 - 0.05*n, "", transform=ax.transAxes, va='top',
+                             color=vir(j / len(runs))))
+
+    # the axes can't move between frames, so fit them to every frame now
+    xlim = movie.data_limits(frames, xlog, 0)
+    ylim = movie.data_limits(frames, ylog, 1)
+    if xlim is not None and ylim is not None:
+        ax.update_datalim([(xlim[0], ylim[0]), (xlim[1], ylim[1])])
+        ax.autoscale_view()
+    if flag == 'AXYZ':
+        ax.set_ylim(bottom=10**(-10))
+    ax.set_title(spec['title'] + ": " + filename)
+    ax.set_ylabel(spec['ylabel'])
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    finish_axes(fig, ax, args)
+
+    width, height = fig.canvas.get_width_height()
+    encoder = movie.Encoder(filename + spec['suffix'], width, height, fps = args.fps, mp4 = args.mp4)
+    return movie.render_frames(fig, ax, artists, texts, frames, labels, encoder)
+
+#########
+# PLOTS #
+#########
+# hamburger and rustal
+def plot_HR(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot an HR diagram'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].log_Teff, history[i].log_L,
+                color=vir(i / len(history)),
+                ls = '-',
+                linewidth=2,
+                label=hist_lab[i]), history[i], 'log_Teff', 'log_L')
+        progbar()
+    progbarend()
+
+    # mark the ZAMS and mass milestones, for every run
+    annotate(ax, args, runs, 'ZAMS', 'log_Teff', 'log_L')
+    annotate(ax, args, runs, 'mass', 'log_Teff', 'log_L')
+
+    # make the plot
+    ax.set_title("HR Diagram: " + filename)
+    ax.invert_xaxis()
+    ax.set_ylabel('log($L$) [$L_{\odot}$]')
+    ax.set_xlabel('log($T_{eff}$) [K]')
+    return filename + "_HR"
+
+# radical
+def plot_dRdt(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot total radius over time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].radius, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i]), history[i], 'star_age', 'radius')
+        progbar()
+    progbarend()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'mass', 'star_age', 'radius')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Radius Over Time: " + filename)
+    ax.set_ylabel('Radius [$R_{\odot}$]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_dRdt"
+
+# luminary
+def plot_dLdt(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot total luminosity over time, by source'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].luminosity,
+                color=vir(i / len(history)),
+                ls = '-',
+                linewidth=1,
+                label=hist_lab[i]), history[i], 'star_age', 'luminosity')
+        from_history(ax.plot(history[i].star_age, 10**history[i].log_Lnuc,
+                color=vir(i / len(history)),
+                ls = ':',
+                linewidth=2,
+                label='nuclear'), history[i], 'star_age', 'log_Lnuc')
+        from_history(ax.plot(history[i].star_age, history[i].DM_energy_rate/eps_per_Lsun,
+                color=vir(i / len(history)),
+                ls = '--',
+                linewidth=2,
+                label='DM'), history[i], 'star_age', 'DM_energy_rate')
+        progbar()
+    progbarend()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'mass', 'star_age', 'luminosity')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Luminosity Over Time: " + filename)
+    ax.set_ylabel('Luminosity [$L_{\odot}$]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_dLdt"
+
+# error
+def plot_derrdt(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot rel_E_err over time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].rel_E_err, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i]), history[i], 'star_age', 'rel_E_err')
+        progbar()
+    progbarend()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'mass', 'star_age', 'rel_E_err')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Energy Conservation Error Over Time: " + filename)
+    ax.set_ylabel('Error')
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_derrdt"
+
+# error
+def plot_drunerrdt(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot rel_run_E_err over time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].rel_run_E_err, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i]), history[i], 'star_age', 'rel_run_E_err')
+        progbar()
+    progbarend()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'mass', 'star_age', 'rel_run_E_err')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Cumulative Energy Conservation Error Over Time: " + filename)
+    ax.set_ylabel('Cumulative Error')
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_drunerrdt"
+
+# massif
+def plot_dMdt(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot total mass over time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].star_mass, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i]), history[i], 'star_age', 'star_mass')
+        progbar()
+    progbarend()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'radius', 'star_age', 'star_mass')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Mass Over Time: " + filename)
+    ax.set_ylabel('Mass [$M_{\odot}$]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_dMdt"
+
+# dense
+def plot_rho(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial density profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # progress bar
+            progbar()
 
-def aninit():
-    line.set_data([], [])
-    return line,
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
 
-def space(args, history, profs):
-    '''determine how many profiles we want to plot and how to space them'''
-    # how many profiles do we want to plot?
-    if args.number == 0:
-        num = len(profs[j])
-    else:
-        num = args.number
-
-    # by what metric do we equispace them?
-    if args.spacing == "mass":
-                spacing = round(history.star_mass[-1]/num)
-    if args.spacing == "age":
-                spacing = round(history.star_age[-1]/num)
-    if args.spacing == "model":
-                spacing = round(len(profs)/num)
-    return spacing
-
-def spacechk(i, args, history, profs, spacing):
-    '''check if the ith profile is one we want to plot'''
-    # by what metric do we equispace them?
-    if args.spacing == "mass":
-        mod = round(history.star_mass[i]) % spacing
-    if args.spacing == "age":
-        mod = round(history.star_age[i]) % spacing
-    if args.spacing == "model":
-        mod = i % spacing
-
-    # should we skip the first model
-    if args.skip_first:
-        # print("IN SKIP FIRST")
-        if i == 0:
-            mod = 1
-    return mod
+            # make actual plot
+            ax.plot(dat.radius, 10**(dat.logRho),
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Density Profile: " + filename)
+    ax.set_ylabel('Density [g cm$^{-3}$]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_rho"
+
+# mass per cell
+def plot_dm(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial mass per cell profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # progress bar
+            progbar()
+
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.dm,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Cell Mass Profile: " + filename)
+    ax.set_ylabel('Cell Mass [g]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_dm"
+
+# mass per cell
+def plot_cell(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial profile of cells'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # progress bar
+            progbar()
+
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.vlines(dat.radius, 0, 1,
+                    colors=vir(dat.star_age / history[j].star_age[-1]),
+                    linestyles = '-',
+                    linewidth=0.5,
+                    label=lab)
+
+    # plot the plot
+    progbarend()
+    ax.set_title("MESA Cells" + filename)
+    ax.set_xscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_cell"
+
+# crock pot
+def plot_P(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial pressure profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.pressure,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Pressure Profile: " + filename)
+    ax.set_ylabel('Pressure [g cm$^{-1}$ s$^{-2}$]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_P"
+
+# temp
+def plot_T(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial temperature profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.temperature,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Temperature Profile: " + filename)
+    ax.set_ylabel('Temperature [K]')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_T"
+
+# lums
+def plot_L(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial luminosity profile, by source'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.luminosity,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+            ax.plot(dat.radius, dat.extra_L,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '--',
+                    linewidth=1,
+                    label="extra")
+            ax.plot(dat.radius, dat.luminosity - dat.extra_L,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = ':',
+                    linewidth=1,
+                    label="other")
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Luminosity Profile: " + filename)
+    ax.set_ylabel('Luminosity [$L_{\odot}$]')
+    ax.set_yscale('log')
+    ax.set_xscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_L"
+
+# edd
+def plot_Edd(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial Eddington factor profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, 10**(dat.log_L_div_Ledd),
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Eddintgon Factor Profile: " + filename)
+    ax.set_ylabel('Eddington Factor $(\\frac{L(r)}{L_{edd}(r)})$')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_Edd"
+
+# edd2
+def plot_Edd2(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot Freese Eddington factor profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, 10**(dat.log_Lrad_div_Ledd),
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Eddintgon Factor Profile: " + filename)
+    ax.set_ylabel('Eddington Factor $(\\frac{L_{rad}(r)}{L_{edd}(r)})$')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_Edd2"
+
+# beta
+def plot_beta(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial beta (P_gas/P) profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.pgas/dat.pressure,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Beta Profile: " + filename)
+    ax.set_ylabel('$\\beta ~ (\\frac{P_{gas}(r)}{P(r)})$')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    return filename + "_beta"
+
+# composition
+def plot_XYZ(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial composition profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.x_mass_fraction_H,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label="H, " + lab)
+            ax.plot(dat.radius, dat.y_mass_fraction_He,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '--',
+                    linewidth=1,
+                    label="He")
+            ax.plot(dat.radius, dat.z_mass_fraction_metals,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = ':',
+                    linewidth=1,
+                    label="Z")
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("Composition Profile: " + filename)
+    ax.set_ylabel('Composition Fraction')
+    ax.set_yscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    ax.set_ylim(bottom=10**(-10))
+    return filename + "_XYZ"
+
+# DM evolution
+def plot_DMevo(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot DM params over time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        # make actual plot
+        from_history(ax.plot(history[i].star_age, history[i].DM_energy_rate,
+                color=vir(i / len(history)),
+                ls = '-',
+                linewidth=2,
+                label=hist_lab[i] + ' $L_\\chi$ [ergs/s]'), history[i], 'star_age', 'DM_energy_rate')
+        from_history(ax.plot(history[i].star_age, history[i].C_tot,
+                color=vir(i / len(history)),
+                ls = '--',
+                linewidth=2,
+                label='$C_{tot}$ [s$^{-1}$]'), history[i], 'star_age', 'C_tot')
+        from_history(ax.plot(history[i].star_age, history[i].N_chi,
+                color=vir(i / len(history)),
+                ls = ':',
+                linewidth=2,
+                label='$N_\\chi$'), history[i], 'star_age', 'N_chi')
+        progbar()
+
+    # mark the milestones, for every run
+    annotate(ax, args, runs, 'mass', 'star_age', 'C_tot')
+
+    # make the plot
+    progbarend()
+    ax.set_title("Dark Matter Over Time: " + filename)
+    ax.set_yscale('log')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_DMevo"
+
+# DM profile
+def plot_DMheat(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial DM heating profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, dat.extra_heat,
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("DM Heat Profile: " + filename)
+    ax.set_yscale('log')
+    ax.set_xscale('log')
+    ax.set_ylabel('$Q_{\\chi}(r)$ [ergs/s/g]')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    ax.set_ylim(bottom=10**(-14))
+    return filename + "_DMheat"
+
+def plot_DMprof(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial DM profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, np.sqrt(dat.n_chi2),
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("DM profile: " + filename)
+    ax.set_yscale('log')
+    ax.set_xscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    ax.set_ylabel('$\int_{cell} n_{\\chi}(r)~ dV$')
+    ax.set_ylim(bottom=10**(-14))
+    return filename + "_DMprof"
+
+def plot_DMprofAC(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot radial DM profile'''
+    for j in range(len(runs)):
+        # loop thru different profile files
+        progbarinit(len(profs[j]))
+        for i in range(len(profs[j])):
+            # get profile info from MESA reader
+            dat, lab, mmm = mesa_prof(runs[j], profs[j][i])
+
+            # make actual plot
+            ax.plot(dat.radius, np.sqrt(dat.rho_chi),
+                    color=vir(dat.star_age / history[j].star_age[-1]),
+                    ls = '-',
+                    linewidth=1,
+                    label=lab)
+
+            # make progress bar
+            progbar()
+
+    # plot the plot
+    progbarend()
+    ax.set_title("DM profile: " + filename)
+    ax.set_yscale('log')
+    ax.set_xscale('log')
+    ax.set_xlabel('Radius [$R_{\odot}$]')
+    ax.set_ylabel('$\int_{cell} n_{\\chi}(r)~ dV$')
+    return filename + "_DMprofAC"
+
+# time
+def plot_cpu(ax, args, runs, history, profs, hist_lab, filename):
+    '''plot star time versus wall time'''
+    progbarinit(len(history))
+    for i in range(len(history)):
+        from_history(ax.plot(history[i].star_age, history[i].elapsed_time,
+                color=vir(i / len(history)),
+                ls = '-',
+                linewidth=2,
+                label=hist_lab[i]), history[i], 'star_age', 'elapsed_time')
+        progbar()
+
+    # make the plot
+    progbarend()
+    ax.set_title("MESA Computation Time " + filename)
+    ax.set_ylabel('Ellapsed Wall Time')
+    ax.set_xlabel('Age [yr]')
+    return filename + "_cpu"
+
+# what each summary is called on a grid plot
+GRID_LABELS = {
+    'models': 'Models',
+    'zams_age': 'ZAMS Age [yr]',
+    'final_mass': 'Final Mass $[M_{\\odot}]$',
+    'max_eddington': 'Maximum Eddington Factor',
+    'peak_DM_energy_rate': 'Peak DM Energy Rate',
+    'elapsed_time': 'Ellapsed Wall Time',
+    'final_N_chi': 'Final $N_{\\chi}$',
+}
+
+def plot_grid(args, rows, metric, filename):
+    '''map one summary of every run onto the (M_chi, rho_chi) grid of the
+    sweep, one panel per star mass, as a heatmap or contours'''
+    rows = [row for row in rows if None not in (row["initial_mass"], row["m_chi"], row["rho_chi"])]
+    masses = sorted(set(row["initial_mass"] for row in rows))
+    if len(masses) == 0:
+        print("no runs to put on a grid...")
+        return None
+    xs = sorted(set(np.log10(row["m_chi"]) for row in rows))
+    ys = sorted(set(np.log10(row["rho_chi"]) for row in rows))
+
+    # one table per star mass, holes where a run is missing
+    grids = np.full((len(masses), len(ys), len(xs)), np.nan)
+    for row in rows:
+        if row[metric] is not None:
+            grids[masses.index(row["initial_mass"]), ys.index(np.log10(row["rho_chi"])),
+                  xs.index(np.log10(row["m_chi"]))] = row[metric]
+
+    # log colors when the metric spans decades
+    finite = grids[np.isfinite(grids)]
+    norm = None
+    if len(finite) > 0 and finite.min() > 0 and finite.max() > 100*finite.min():
+        norm = colors.LogNorm(finite.min(), finite.max())
+    elif len(finite) > 0:
+        norm = colors.Normalize(finite.min(), finite.max())
+
+    fig = new_figure(args)
+    fig.set_size_inches(4*len(masses) + 1, 4)
+    axes = fig.subplots(1, len(masses), squeeze = False)[0]
+    for k, (ax, mass) in enumerate(zip(axes, masses)):
+        if args.contour and len(xs) > 1 and len(ys) > 1:
+            image = ax.contourf(xs, ys, np.ma.masked_invalid(grids[k]), norm = norm, cmap = palette)
+        else:
+            image = ax.pcolormesh(xs, ys, np.ma.masked_invalid(grids[k]), norm = norm, cmap = palette,
+                                  shading = 'nearest')
+            # small grids get their numbers written in
+            if len(xs)*len(ys) <= 64:
+                for j, y in enumerate(ys):
+                    for i, x in enumerate(xs):
+                        if np.isfinite(grids[k, j, i]):
+                            ax.text(x, y, "{:.3g}".format(grids[k, j, i]), ha = 'center', va = 'center',
+                                    fontsize = 7, color = 'grey')
+        ax.set_title(str(round(mass)) + " Msun " + filename)
+        ax.grid(False)
+        ax.set_xlabel('$\\log_{10} M_{\\chi}$ [GeV]')
+        ax.set_xticks(xs)
+        ax.set_yticks(ys)
+        if k == 0:
+            ax.set_ylabel('$\\log_{10} \\rho_{\\chi}$ [GeV cm$^{-3}$]')
+    fig.colorbar(image, ax = list(axes), label = GRID_LABELS.get(metric, metric))
+    fig.subplots_adjust(bottom = 0.15)
+    name = filename + "_grid_" + metric
+    write_fig(fig, name, args)
+    if args.show:
+        plt.show()
+    return name
+
+# every plot we know how to make, in the order they get made
+PLOTS = {
+    'HR': plot_HR,
+    'dRdt': plot_dRdt,
+    'dLdt': plot_dLdt,
+    'derrdt': plot_derrdt,
+    'drunerrdt': plot_drunerrdt,
+    'dMdt': plot_dMdt,
+    'rho': plot_rho,
+    'dm': plot_dm,
+    'cell': plot_cell,
+    'P': plot_P,
+    'T': plot_T,
+    'L': plot_L,
+    'Edd': plot_Edd,
+    'Edd2': plot_Edd2,
+    'beta': plot_beta,
+    'XYZ': plot_XYZ,
+    'DMevo': plot_DMevo,
+    'DMheat': plot_DMheat,
+    'DMprof': plot_DMprof,
+    'DMprofAC': plot_DMprofAC,
+    'cpu': plot_cpu,
+}
 
 ########
 # MAIN #
 ########
 def main():
+    global render_state
     parser = argparse.ArgumentParser(formatter_class=argparse.MetavarTypeHelpFormatter)
     parser.add_argument("-D", "--dir", nargs='+', help="directory or directories containing data files", type=str)
+    parser.add_argument("-Q", "--query", help="plot the runs in the catalog matching this, e.g. \"m_chi = 1d8 and star_mass > 500\"", type=str)
     parser.add_argument("--DMevo", help="plot DM params over time", action='store_true')
     parser.add_argument("--DMheat", help="plot radial DM heating profile", action='store_true')
     parser.add_argument("--DMprof", help="plot radial DM profile", action='store_true')
@@ -302,8 +1329,10 @@ def main():
     parser.add_argument("--Edd2", help="plot Freese Eddington factor profile", action='store_true')
     parser.add_argument("--beta", help="plot radial beta (P_gas/P) profile", action='store_true')
     parser.add_argument("--XYZ", help="plot radial composition profile", action='store_true')
+    parser.add_argument("--grid", nargs='+', help="map these run summaries onto the (M_chi, rho_chi) grid, one panel per star mass: " + ", ".join(GRID_LABELS), type=str)
+    parser.add_argument("--contour", help="draw --grid as contours rather than a heatmap", action='store_true')
     parser.add_argument("-n", "--number", help="how many profiles to plot, equispaced by interest", type=int, default=0)
-    # parser.add_argument("--range", nargs=2, help="time range of profiles to plot, min and max in [yr]", type=float)
+    parser.add_argument("--range", nargs=2, help="time range to plot, min and max in [yr], only those history rows and profiles are read", type=float)
     parser.add_argument("--Arho", help="animate radial density profile", action='store_true')
     parser.add_argument("--AP", help="animate radial pressure profile", action='store_true')
     parser.add_argument("--AT", help="animate radial temperature profile", action='store_true')
@@ -311,6 +1340,9 @@ def main():
     parser.add_argument("--AEdd", help="animate radial Eddington factor profile", action='store_true')
     parser.add_argument("--Abeta", help="animate radial beta (P_gas/P) profile", action='store_true')
     parser.add_argument("--AXYZ", help="animate radial composition profile", action='store_true')
+    parser.add_argument("--frames", help="animation frames, interpolated in time between profiles, default one per profile", type=int, default=0)
+    parser.add_argument("--fps", help="animation frames per second", type=int, default=20)
+    parser.add_argument("--mp4", help="write animations as mp4 rather than GIF, needs ffmpeg", action='store_true')
     parser.add_argument("--poly", help="add a polytrope with specified index to plots", type=float)
     parser.add_argument("--Rnorm", help="normalize all radial profiles to R_star", action='store_true')
     parser.add_argument("--dM", help="use enclosed mass instead of radius for all profiles", action='store_true')
@@ -327,10 +1359,17 @@ def main():
     parser.add_argument("--xlin", help="force lin scale on x axis", action='store_true')
     parser.add_argument("--ylin", help="force lin scale on y axis", action='store_true')
     parser.add_argument("--PDF", help="produce PDFs of the plots", action='store_true')
+    parser.add_argument("--vertex-budget", help="with --PDF, draw the densest lines as pictures until at most this many vertices are left as vectors", type=int, default=200000)
     parser.add_argument("-s", "--show", help="open plot in window", action='store_true')
     parser.add_argument("--spacing", help="how to equispace profiles, by mass, age, or model", type=str, default="age")
     parser.add_argument("--skip-first", help="don't plot the first profile model", action='store_true')
     parser.add_argument("--no-legend", help="don't plot the legend", action='store_true')
+    parser.add_argument("--no-cache", help="don't read or write the binary history cache", action='store_true')
+    parser.add_argument("--cache-mb", help="memory budget for parsed profiles, in MB", type=float, default=2048)
+    parser.add_argument("--every-row", help="draw every history row, not just the ones that show at the saved resolution", action='store_true')
+    parser.add_argument("--float32", help="keep history and profile data as 32 bit floats to save memory", action='store_true')
+    parser.add_argument("-w", "--watch", help="keep redrawing the history plots as running jobs add rows, polling every this many seconds", type=float)
+    parser.add_argument("-j", "--jobs", help="number of processes to load data and render plots with", type=int, default=1)
     args = parser.parse_args()
 
     # print
@@ -350,18 +1389,6 @@ def main():
     # assign various physical constants as global variables
     assign_const()
 
-    # set up some plotting stuff
-    # fig = plt.figure()
-    fig = plt.figure(figsize = (24,16))
-    plt.figure(figsize = (24,16))
-    # plt.style.use('fast')
-    palette = plt.get_cmap('magma')
-    vir = plt.get_cmap('viridis')
-    fig = plt.figure()
-    ax = plt.axes()
-    global line
-    line, = ax.plot([], [], lw=3)
-
     # theme
     if args.dark:
         plt.style.use('dark_background')
@@ -373,1198 +1400,119 @@ def main():
     else:
         plt.style.use('Solarize_Light2')
 
+    # pick the runs out of the catalog
+    if args.query:
+        # the catalog reads inlists with bin/namelist.py, so only bring it in
+        # when it's asked for, plain plotting needs nothing outside utils/
+        import catalog
+        print("querying the run catalog...")
+        args.dir = (args.dir or []) + catalog.select(args.query)
+        if len(args.dir) == 0:
+            print("no runs match " + args.query)
+            return
+
     # filename handling
     if args.filename:
         # custom file name
         filename = args.filename
+    elif args.query:
+        # catalog paths go down into LOGS, so name them for the query
+        filename = "catalog"
     else:
         # or just concatinate all the directory names
-        filename = ''.join(args.dir)
-
-    # make our history list
+        filename = ''.join(args.dir or [])
+
+    # grid plots come out of the run summaries, not the histories
+    if args.grid:
+        print("summarizing runs...")
+        import summarize
+        rows, changed = summarize.update(".", jobs = args.jobs)
+        if args.dir:
+            names = set(os.path.basename(os.path.normpath(d)) for d in args.dir)
+            rows = [row for row in rows if row["name"] in names]
+        for metric in args.grid:
+            if metric not in GRID_LABELS:
+                print("no summary called " + metric + ", try one of " + ", ".join(GRID_LABELS))
+                continue
+            name = plot_grid(args, rows, metric, filename or "sweep")
+            if name is not None:
+                print("wrote " + name)
+        # nothing else to do unless other plots were asked for too
+        if not any(getattr(args, flag) for flag in list(PLOTS) + list(ANIMS)):
+            return
+
+    # every run shares one pool of parsed profiles
+    prof_cache = ProfileCache(args.cache_mb)
+
+    # load each run once, history, profile index and all
     if args.dir:
+        # where the histories ended before we read them, --watch carries on
+        # from there
+        if args.watch:
+            sizes = [os.path.getsize(history_file(d)) for d in args.dir]
         print("fetching history files...")
-        history = []
-        mrdirs = []
-        progbarinit(len(args.dir))
-        for i in range(len(args.dir)):
-            # progress bar
-            progbar()
-
-            # pick up the data from history files
-            history.append(mr.MesaData(args.dir[i] + '/history_' + args.dir[i] + '.data'))
-
-            # generate all the mesa reader objects we need
-            mrdirs.append(mesa_dir(args.dir[i]))
-        progbarend()
+        hist_cols, prof_cols = needed_columns(args)
+        dtype = np.float32 if args.float32 else None
+        runs = load_runs(args.dir, jobs = args.jobs, cache = not args.no_cache, prof_cache = prof_cache,
+                         hist_columns = hist_cols, prof_columns = prof_cols, dtype = dtype,
+                         age_range = args.range)
+
+        # the plots below mostly want the histories, and the model numbers of
+        # just the profiles we're going to plot
+        history = [run.history for run in runs]
+        profs = selected_models(args, runs)
+
+        # parse every profile we're going to plot up front, in parallel
+        if args.jobs > 1 and len(prof_cols) > 0:
+            print("fetching profiles...")
+            prefetch_profiles(runs, profs, jobs = args.jobs)
 
         # create our legend labels
         print("generating history labels...")
         hist_lab = gen_hist_labels(args.dir, history)
 
-        # find the interesting profile indices
-        print("fetching profile indices...")
-        profs = gen_profs(args.dir)
-
-    # hamburger and rustal
-    if args.HR:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].log_Teff, history[i].log_L,
-                    color=vir(i / len(history)),
-                    ls = '-',
-                    linewidth=2,
-                    label=hist_lab[i])
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        hit_ZAMS = False
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass950 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            nucpercent = 10**(history[i].log_Lnuc[j]) / 10**(history[i].log_L[j])
-            if nucpercent > 0.900 and hit_ZAMS == False and history[i].star_age[j] > 50.0:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], c="#E0115F", s=10)
-                plt.annotate(str(round(history[i].star_age[j]))+" yr " + str(round(history[i].radius[j],2))+" $R_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                hit_ZAMS = True
-
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 950.0) < 0.1 and mass950 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass950 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].log_Teff[j], history[i].log_L[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].log_Teff[j], history[i].log_L[j]))
-                mass1000 = True
-
-        # make the plot
-        plt.title("HR Diagram: " + filename)
-        plt.gca().invert_xaxis()
-        plt.ylabel('log($L$) [$L_{\odot}$]')
-        plt.xlabel('log($T_{eff}$) [K]')
-        name = filename + "_HR" 
-        save_plt(plt, name, args)
-
-    # radical
-    if args.dRdt:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].radius, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i])
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Radius Over Time: " + filename)
-        plt.ylabel('Radius [$R_{\odot}$]')
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_dRdt" 
-        save_plt(plt, name, args)
-
-    # luminary
-    if args.dLdt:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].luminosity,
-                    color=vir(i / len(history)),
-                    ls = '-',
-                    linewidth=1,
-                    label=hist_lab[i])
-            plt.plot(history[i].star_age, 10**history[i].log_Lnuc,
-                    color=vir(i / len(history)),
-                    ls = ':',
-                    linewidth=2,
-                    label='nuclear')
-            plt.plot(history[i].star_age, history[i].DM_energy_rate/eps_per_Lsun,
-                    color=vir(i / len(history)),
-                    ls = '--',
-                    linewidth=2,
-                    label='DM')
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].luminosity[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].luminosity[j]))
-                mass1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Luminosity Over Time: " + filename)
-        plt.ylabel('Luminosity [$L_{\odot}$]')
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_dLdt" 
-        save_plt(plt, name, args)
-
-    # error
-    if args.derrdt:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].rel_E_err, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i])
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Energy Conservation Error Over Time: " + filename)
-        plt.ylabel('Error')
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_derrdt" 
-        save_plt(plt, name, args)
-
-    # error
-    if args.drunerrdt:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].rel_run_E_err, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i])
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].radius[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].radius[j]))
-                mass1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Cumulative Energy Conservation Error Over Time: " + filename)
-        plt.ylabel('Cumulative Error')
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_drunerrdt" 
-        save_plt(plt, name, args)
-
-    # massif
-    if args.dMdt:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].star_mass, color=vir(i / len(history)), ls = '-', linewidth=2, label=hist_lab[i])
-            progbar()
-        progbarend()
-
-        # add ZAMS anotation
-        rad1 = False
-        rad3 = False
-        rad5 = False
-        rad10 = False
-        rad30 = False
-        rad50 = False
-        rad100 = False
-        rad300 = False
-        rad500 = False
-        rad1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].radius[j] - 1.0) < 0.1 and rad1 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad1 = True
-
-            if abs(history[i].radius[j] - 3.0) < 0.1 and rad3 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad1 = True
-
-            if abs(history[i].radius[j] - 5.0) < 0.1 and rad5 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad5 = True
-
-            if abs(history[i].radius[j] - 10.0) < 0.1 and rad10 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad10 = True
-
-            if abs(history[i].radius[j] - 30.0) < 0.1 and rad30 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad30 = True
-
-            if abs(history[i].radius[j] - 50.0) < 0.1 and rad50 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad50 = True
-
-            if abs(history[i].radius[j] - 100.0) < 0.1 and rad100 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad100 = True
-
-            if abs(history[i].radius[j] - 300.0) < 0.1 and rad300 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad300 = True
-
-            if abs(history[i].radius[j] - 500.0) < 0.1 and rad500 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad500 = True
-
-            if abs(history[i].radius[j] - 1000.0) < 0.1 and rad1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].star_mass[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].radius[j])) + " $R_{\odot}$", (history[i].star_age[j], history[i].star_mass[j]))
-                rad1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Mass Over Time: " + filename)
-        plt.ylabel('Mass [$M_{\odot}$]')
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_dMdt" 
-        save_plt(plt, name, args)
-
-    # dense
-    if args.rho:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # progress bar
-                progbar()
-
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, 10**(dat.logRho),
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-        # plot the plot
-        progbarend()
-        plt.title("Density Profile: " + filename)
-        plt.ylabel('Density [g cm$^{-3}$]')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_rho" 
-        save_plt(plt, name, args)
-
-    # mass per cell 
-    if args.dm:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # progress bar
-                progbar()
-
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.dm,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-        # plot the plot
-        progbarend()
-        plt.title("Cell Mass Profile: " + filename)
-        plt.ylabel('Cell Mass [g]')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_dm" 
-        save_plt(plt, name, args)
-
-    # mass per cell 
-    if args.cell:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # progress bar
-                progbar()
-
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.vlines(dat.radius, 0, 1,
-                            colors=vir(dat.star_age / history[j].star_age[-1]),
-                            linestyles = '-',
-                            linewidth=0.5,
-                            label=lab)
-
-        # plot the plot
-        progbarend()
-        plt.title("MESA Cells" + filename)
-        plt.xscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_cell" 
-        save_plt(plt, name, args)
-
-    # crock pot
-    if args.P:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.pressure,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Pressure Profile: " + filename)
-        plt.ylabel('Pressure [g cm$^{-1}$ s$^{-2}$]')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_P" 
-        save_plt(plt, name, args)
-
-    # temp
-    if args.T:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.temperature,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Temperature Profile: " + filename)
-        plt.ylabel('Temperature [K]')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_T" 
-        save_plt(plt, name, args)
-
-    # lums
-    if args.L:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.luminosity,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-                    plt.plot(dat.radius, dat.extra_L,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '--',
-                            linewidth=1,
-                            label="extra")
-                    plt.plot(dat.radius, dat.luminosity - dat.extra_L,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = ':',
-                            linewidth=1,
-                            label="other")
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Luminosity Profile: " + filename)
-        plt.ylabel('Luminosity [$L_{\odot}$]')
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_L" 
-        save_plt(plt, name, args)
-
-    # edd
-    if args.Edd:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, 10**(dat.log_L_div_Ledd),
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Eddintgon Factor Profile: " + filename)
-        plt.ylabel('Eddington Factor $(\\frac{L(r)}{L_{edd}(r)})$')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_Edd" 
-        save_plt(plt, name, args)
-
-    # edd2
-    if args.Edd2:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, 10**(dat.log_Lrad_div_Ledd),
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Eddintgon Factor Profile: " + filename)
-        plt.ylabel('Eddington Factor $(\\frac{L_{rad}(r)}{L_{edd}(r)})$')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_Edd2" 
-        save_plt(plt, name, args)
-
-    # beta
-    if args.beta:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.pgas/dat.pressure,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Beta Profile: " + filename)
-        plt.ylabel('$\\beta ~ (\\frac{P_{gas}(r)}{P(r)})$')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_beta" 
-        save_plt(plt, name, args)
-
-    # composition
-    if args.XYZ:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.x_mass_fraction_H,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label="H, " + lab)
-                    plt.plot(dat.radius, dat.y_mass_fraction_He,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '--',
-                            linewidth=1,
-                            label="He")
-                    plt.plot(dat.radius, dat.z_mass_fraction_metals,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = ':',
-                            linewidth=1,
-                            label="Z")
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("Composition Profile: " + filename)
-        plt.ylabel('Composition Fraction')
-        plt.yscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        plt.ylim(bottom=10**(-10))
-        name = filename + "_XYZ" 
-        save_plt(plt, name, args)
-
-    # DM evolution
-    if args.DMevo:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            # make actual plot
-            plt.plot(history[i].star_age, history[i].DM_energy_rate,
-                    color=vir(i / len(history)),
-                    ls = '-',
-                    linewidth=2,
-                    label=hist_lab[i] + ' $L_\\chi$ [ergs/s]')
-            plt.plot(history[i].star_age, history[i].C_tot,
-                    color=vir(i / len(history)),
-                    ls = '--',
-                    linewidth=2,
-                    label='$C_{tot}$ [s$^{-1}$]')
-            plt.plot(history[i].star_age, history[i].N_chi,
-                    color=vir(i / len(history)),
-                    ls = ':',
-                    linewidth=2,
-                    label='$N_\\chi$')
-            progbar()
-
-        # add ZAMS anotation
-        progbarend()
-        mass100 = False
-        mass200 = False
-        mass300 = False
-        mass400 = False
-        mass500 = False
-        mass600 = False
-        mass700 = False
-        mass800 = False
-        mass900 = False
-        mass1000 = False
-
-        # for all timesteps in a star
-        progbarinit(len(history))
-        for j in range(len(history[i].star_age)):
-            # write to stdout
-            l = len(history[i].star_age)
-            a = j
-            progbar()
-
-            # annotations
-            if abs(history[i].star_mass[j] - 100.0) < 0.1 and mass100 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(2/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass100 = True
-
-            if abs(history[i].star_mass[j] - 200.0) < 0.1 and mass200 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(3/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass200 = True
-
-            if abs(history[i].star_mass[j] - 300.0) < 0.1 and mass300 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(4/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass300 = True
-
-            if abs(history[i].star_mass[j] - 400.0) < 0.1 and mass400 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(5/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass400 = True
-
-            if abs(history[i].star_mass[j] - 500.0) < 0.1 and mass500 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(6/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass500 = True
-
-            if abs(history[i].star_mass[j] - 600.0) < 0.1 and mass600 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(7/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass600 = True
-
-            if abs(history[i].star_mass[j] - 700.0) < 0.1 and mass700 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(8/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass700 = True
-
-            if abs(history[i].star_mass[j] - 800.0) < 0.1 and mass800 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(9/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass800 = True
-
-            if abs(history[i].star_mass[j] - 900.0) < 0.1 and mass900 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(10/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass900 = True
-
-            if abs(history[i].star_mass[j] - 1000.0) < 0.1 and mass1000 == False:
-                plt.scatter(history[i].star_age[j], history[i].C_tot[j], color=palette(11/12), s=20)
-                plt.annotate(str(round(history[i].star_mass[j])) + " $M_{\odot}$", (history[i].star_age[j], history[i].C_tot[j]))
-                mass1000 = True
-
-        # make the plot
-        progbarend()
-        plt.title("Dark Matter Over Time: " + filename)
-        plt.yscale('log')
-        plt.xlabel('Age [yr]')
-        name = filename + "_DMevo" 
-        save_plt(plt, name, args)
-
-    # DM profile
-    if args.DMheat:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, dat.extra_heat,
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("DM Heat Profile: " + filename)
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.ylabel('$Q_{\\chi}(r)$ [ergs/s/g]')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        plt.ylim(bottom=10**(-14))
-        name = filename + "_DMheat" 
-        save_plt(plt, name, args)
-
-    if args.DMprof:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, np.sqrt(dat.n_chi2),
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("DM profile: " + filename)
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        plt.ylabel('$\int_{cell} n_{\\chi}(r)~ dV$')
-        plt.ylim(bottom=10**(-14))
-        name = filename + "_DMprof" 
-        save_plt(plt, name, args)
-
-    if args.DMprofAC:
-        for j in range(len(mrdirs)):
-            # loop thru different profile files
-            progbarinit(len(profs[j]))
-            for i in range(len(profs[j])):
-                # is this one we want to plot?
-                spacing = space(args, history[j], profs[j])
-
-                # modulo
-                if spacechk(i, args, history[j], profs[j], spacing) == 0:
-                    # get profile info from MESA reader
-                    dat, lab, mmm = mesa_prof(mrdirs[j], profs[j][i])
-
-                    # make actual plot
-                    plt.plot(dat.radius, np.sqrt(dat.rho_chi),
-                            color=vir(dat.star_age / history[j].star_age[-1]),
-                            ls = '-',
-                            linewidth=1,
-                            label=lab)
-
-                    # make progress bar
-                    progbar()
-
-        # plot the plot
-        progbarend()
-        plt.title("DM profile: " + filename)
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.xlabel('Radius [$R_{\odot}$]')
-        plt.ylabel('$\int_{cell} n_{\\chi}(r)~ dV$')
-        name = filename + "_DMprofAC" 
-        save_plt(plt, name, args)
-
-    # time 
-    if args.cpu:
-        progbarinit(len(history))
-        for i in range(len(history)):
-            plt.plot(history[i].star_age, history[i].elapsed_time,
-                    color=vir(i / len(history)),
-                    ls = '-',
-                    linewidth=2,
-                    label=hist_lab[i])
-            progbar()
-
-        # make the plot
-        progbarend()
-        plt.title("MESA Computation Time " + filename)
-        plt.ylabel('Ellapsed Wall Time')
-        plt.xlabel('Age [yr]')
-        name = filename + "_cpu" 
-        save_plt(plt, name, args)
-
-    # dense
-    if args.Arho:
-        def animate(k):
-            # get profile info from MESA reader
-            dat, lab, mmm = mesa_prof(mrdirs[0], profs[0][k])
-
-            # set our data
-            x = dat.radius
-            y = 10**(dat.logRho) 
-            line.set_data(x, y)
-
-            # return to animation 
-            return line,
-
-        # plot the plot
-        # fig.plt.title("Density Profile: " + filename)
-        # fig.plt.legend()
-        # fig.plt.ylabel('Density [g cm$^{-3}$]')
-        # fig.plt.yscale('log')
-        # fig.plt.xlabel('Radius [$R_{\odot}$]')
-        name = filename + "_rho" 
-        anim = an.FuncAnimation(fig, animate, init_func=aninit, frames=200, interval=20, blit=True)
-        anim.save(name + '.gif', writer='imagemagick')
+    # draw every plot we were asked for, each on its own figure, and several
+    # at once if we have processes to spare
+    todo = [flag for flag in PLOTS if getattr(args, flag)]
+
+    # history plots we keep open and redraw as the runs go on
+    live = []
+    if args.watch:
+        live = [flag for flag in todo if flag in LIVE_LINES]
+        todo = [flag for flag in todo if flag not in LIVE_LINES]
+
+    # find the events once, here, so every plot (and worker) shares them
+    if not args.no_annotate:
+        for flag in todo:
+            for kind in PLOT_EVENTS.get(flag, []):
+                for run in runs:
+                    run.events(kind)
+    if args.jobs > 1 and len(todo) > 1 and not args.show:
+        print("rendering " + str(len(todo)) + " plots...")
+        render_state = (args, runs, history, profs, hist_lab, filename)
+        with ProcessPoolExecutor(min(args.jobs, len(todo)), mp_context = multiprocessing.get_context('fork')) as pool:
+            for hits, misses in pool.map(render_worker, todo):
+                prof_cache.hits += hits
+                prof_cache.misses += misses
+    else:
+        for flag in todo:
+            render(flag, args, runs, history, profs, hist_lab, filename)
+
+    # follow the running jobs until told to stop
+    if len(live) > 0:
+        tails = [mio.HistoryTail(run.history_file, hist_cols, start = sizes[j]) for j, run in enumerate(runs)]
+        watch(live, args, runs, history, profs, hist_lab, filename, tails)
+
+    # animations, one after another since each is one long stream
+    for flag in ANIMS:
+        if getattr(args, flag):
+            print("animating --" + flag + "...")
+            name = make_animation(flag, args, runs, profs, filename)
+            if name is not None:
+                print("wrote " + name)
+
+    # how well did the profile cache do
+    print(prof_cache.report())
 
 ###########
 # EXECUTE #